@@ -1,6 +1,9 @@
+import functools
 from cache_simulator.controller.performance import Performance
 from cache_simulator.controller.memoryHierarchy import MemoryHierarchy
 from cache_simulator.controller.status import Status
+from cache_simulator.controller.footprint import account_footprint
+from cache_simulator.controller.trace import FLAG_NEW_TICK, FLAG_WRITE_BACK
 
 class MemoryController:
     """
@@ -10,11 +13,33 @@ class MemoryController:
         hierarchy: MemoryHierarchy object representing the memory levels.
         performance: performance metrics of memory operations.
         timestamp: Global clock time for access tracking.
+        recorder: FilteredTraceWriter receiving the requests that enter level record_level, None if not recording.
+        record_level: Index of the level whose incoming requests are recorded (len(levels) is main memory), -1 if not recording.
     """
-    def __init__(self, file_path):
-        self.hierarchy = MemoryHierarchy(file_path)
+    def __init__(self, file_path=None, config=None, compact=False):
+        self.hierarchy = MemoryHierarchy(file_path, config=config, compact=compact)
         self.performance = Performance()
+        # Cycles simulated before the statistics were last reset
+        self.cycle_offset = 0
         self.timestamp = 0
+        self.recorder = None
+        self.record_level = -1
+        # Prefetch fills happen inside the caches, route their evictions back here
+        for level, cache in enumerate(self.hierarchy.levels):
+            cache.eviction_handler = functools.partial(self.handle_eviction, level)
+        # Links with a bandwidth model. fill_cycle is the clock of the access in
+        # progress: it starts at the current cycle and moves to the arrival of each block
+        # the access fills, the write-backs and prefetches it causes leave then
+        self.contention = any(link is not None for link in self.hierarchy.links)
+        self.fill_cycle = 0
+        # Prefetched blocks occupy the link below the level they are filled into
+        if self.contention:
+            for level, cache in enumerate(self.hierarchy.levels):
+                if self.hierarchy.links[level + 1] is not None:
+                    cache.prefetch_handler = functools.partial(self.use_link, level + 1, None, "prefetch")
+        # Page walks read the page tables through the data caches
+        if self.hierarchy.translator is not None:
+            self.hierarchy.translator.walk_read = self.walk_read
 
     def time_tick(self):
         """
@@ -22,21 +47,73 @@ class MemoryController:
         """
         self.timestamp += 1
 
-    def read(self, address):
+    def current_cycle(self) -> int:
+        """
+        Cycle count seen by the memory system, accesses are blocking so this is the latency accumulated so far.
+        """
+        return self.cycle_offset + self.performance.total_latency
+
+    def reset_stats(self):
+        """
+        Start a new measurement on a warmed hierarchy: the Performance and the counters
+        of every component are reset, the cached data and the policy and timing state
+        stay. The clock keeps running, so the busy time of banks and links still
+        lines up with the accesses that follow.
+        """
+        cycle = self.current_cycle()
+        self.cycle_offset = cycle
+        self.performance = Performance()
+        for cache in self.hierarchy.levels:
+            cache.reset_stats()
+        self.hierarchy.main_memory.reset_stats(cycle)
+        for link in self.hierarchy.links:
+            if link is not None:
+                link.reset_stats(cycle)
+        if self.hierarchy.translator is not None:
+            self.hierarchy.translator.reset_stats()
+
+    def start_recording(self, cache_name, recorder):
+        """
+        Record every request leaving a cache level (demand reads and dirty write-backs)
+        so a hierarchy starting at the next level can replay it.
+
+        Args:
+            cache_name: id of the level whose outgoing requests are recorded.
+            recorder: FilteredTraceWriter to write the requests to.
+        """
+        if self.hierarchy.inclusion_policy != "NINE":
+            raise ValueError("Filtered traces can only be recorded with the NINE inclusion policy")
+        names = [cache.name for cache in self.hierarchy.levels]
+        if cache_name not in names:
+            raise ValueError(f"Unknown cache level '{cache_name}', expected one of {names}")
+        self.recorder = recorder
+        self.record_level = names.index(cache_name) + 1
+
+    def read(self, address, tick=True, demand=True) -> int:
         """
         Read data from the memory hierarchy starting from L1 cache.
 
         Args:
             address: The memory address to read from.
+            tick: Advance the clock first; a replayed read issued in the same tick as the previous request does not.
+            demand: Count the read as a program access. Page walk reads are not, their
+                latency is returned to the translator instead of being recorded.
+
+        Returns:
+            int: Latency of the read in cycles.
         """
         total_latency = 0
         hit_level = -1
         cache_hit = False
-        self.time_tick()
+        if tick:
+            self.time_tick()
+        self.fill_cycle = self.current_cycle()
 
         for level, cache in enumerate(self.hierarchy.levels):
+            if level == self.record_level:
+                self.recorder.record(address, self.timestamp, is_write_back=False)
             status = cache.read(address, self.timestamp)
-            if level == 0:
+            if level == 0 and demand:
                 self.performance.record_access(status)
             self.performance.record_cache_access(cache.name, status)
             total_latency += cache.hit_latency
@@ -47,21 +124,177 @@ class MemoryController:
                 break
         
         if not cache_hit:
-            total_latency += self.hierarchy.main_memory_latency
+            if self.record_level == len(self.hierarchy.levels):
+                self.recorder.record(address, self.timestamp, is_write_back=False)
+            total_latency += self.hierarchy.bus_latencies[-1]
+            total_latency += self.hierarchy.main_memory.read(address, self.current_cycle() + total_latency)
             hit_level = len(self.hierarchy.levels)
             self.performance.record_cache_access("MainMemory", None)
-            total_latency += self.hierarchy.bus_latencies[-1]
 
-        for level in range(hit_level - 1, -1, -1):
-            is_dirty, evited, evicted_address, _ = self.hierarchy.levels[level].fill(address, self.timestamp)
-            total_latency += self.hierarchy.bus_latencies[level]
-            if evited:
-                self.performance.record_replacement()
-            if is_dirty:
-                # write back to next level
-                self.handle_write_back(evicted_address, level + 1, sync=False)
+        if self.hierarchy.inclusion_policy == "Exclusive" and hit_level > 0:
+            # The line moves to L1 and leaves the level it was found in
+            for level in range(hit_level - 1, -1, -1):
+                total_latency += self.hierarchy.bus_latencies[level]
+                if self.contention:
+                    total_latency += self.send_fill(level, total_latency)
+            self.move_line(address, hit_level, 0)
+        else:
+            for level in range(hit_level - 1, -1, -1):
+                total_latency += self.hierarchy.bus_latencies[level]
+                if self.contention:
+                    total_latency += self.send_fill(level, total_latency)
+                self.fill_level(level, address)
+
+        if demand:
+            self.performance.record_latency(total_latency)
+        return total_latency
+
+    def fill_level(self, level, address, dirty=False):
+        """
+        Fill an address into one cache level and handle the line it evicts.
+
+        Args:
+            level: Index of the cache level to fill.
+            address: The memory address to fill.
+            dirty: The filled line carries modified data (exclusive moves and victims).
+        """
+        cache = self.hierarchy.levels[level]
+        ret = cache.fill(address, self.timestamp)
+        if ret[1]:
+            self.performance.record_replacement()
+        if dirty and not cache.mark_dirty(address):
+            # The fill was bypassed, the modified data has to go further down
+            self.insert_victim(address, level + 1, dirty=True)
+        self.handle_eviction(level, ret)
+
+    def use_link(self, index, cycle, kind) -> int:
+        """
+        Send one block over a link that models bandwidth.
+
+        Args:
+            index: Index of the link in hierarchy.links.
+            cycle: Cycle at which the block is sent, None for the clock of the access
+                in progress (fill_cycle).
+            kind: "demand", "prefetch" or "write_back".
+
+        Returns:
+            int: Queueing delay of the block, 0 if the link has no bandwidth model.
+        """
+        link = self.hierarchy.links[index]
+        if link is None:
+            return 0
+        if cycle is None:
+            cycle = max(self.current_cycle(), self.fill_cycle)
+        return link.transfer(cycle, kind, self.current_cycle())
 
-        self.performance.record_latency(total_latency)
+    def send_fill(self, level, latency) -> int:
+        """
+        Send the block of a demand read over the link below the level it fills.
+
+        Args:
+            level: Index of the cache level being filled.
+            latency: Latency of the read so far.
+
+        Returns:
+            int: Queueing delay added to the read.
+        """
+        link = self.hierarchy.links[level + 1]
+        cycle = self.current_cycle() + latency
+        if link is None:
+            self.fill_cycle = cycle
+            return 0
+        delay = link.transfer(cycle, "demand", self.current_cycle())
+        self.fill_cycle = cycle + delay + link.transfer_cycles
+        return delay
+
+    def handle_eviction(self, level, fill_result):
+        """
+        Apply the inclusion policy to the line evicted by a fill.
+
+        - NINE: dirty victims are written back to the next level.
+        - Inclusive: copies in upper levels are back-invalidated, then dirty data is written back.
+        - Exclusive: the victim, clean or dirty, is inserted into the next level.
+
+        Args:
+            level: Index of the cache level that was filled.
+            fill_result: Tuple returned by Cache.fill.
+        """
+        is_dirty, evicted, evicted_address, _ = fill_result
+        if not evicted:
+            return
+        policy = self.hierarchy.inclusion_policy
+        if policy == "Inclusive":
+            is_dirty = self.back_invalidate(level, evicted_address) or is_dirty
+        if policy == "Exclusive":
+            self.insert_victim(evicted_address, level + 1, dirty=is_dirty)
+        elif is_dirty:
+            # write back to next level
+            self.handle_write_back(evicted_address, level + 1, sync=False)
+
+    def back_invalidate(self, level, address) -> bool:
+        """
+        Invalidate every copy of a block above the given level.
+
+        Returns:
+            bool: True if any invalidated copy was dirty.
+        """
+        block_size = self.hierarchy.levels[level].block_size
+        any_dirty = False
+        for upper in self.hierarchy.levels[:level]:
+            for sub_block in range(address, address + block_size, upper.block_size):
+                present, dirty = upper.invalidate(sub_block)
+                if present:
+                    self.performance.record_back_invalidation()
+                any_dirty = any_dirty or dirty
+        return any_dirty
+
+    def take_line(self, address, level) -> bool:
+        """
+        Remove a line from a level so it can move up (exclusive hierarchy).
+
+        Returns:
+            bool: True if the removed line was dirty.
+        """
+        if level >= len(self.hierarchy.levels):
+            return False
+        _, dirty = self.hierarchy.levels[level].invalidate(address)
+        return dirty
+
+    def move_line(self, address, source, level):
+        """
+        Move a line up from the level it was found in (exclusive hierarchy). The line
+        is only taken from its source once the destination allocated it, a bypassed
+        fill leaves it where it was instead of dropping it from the hierarchy.
+
+        Args:
+            address: The memory address to move.
+            source: Index of the level holding the line, len(levels) for main memory.
+            level: Index of the level to move it to.
+        """
+        cache = self.hierarchy.levels[level]
+        ret = cache.fill(address, self.timestamp)
+        if ret[1]:
+            self.performance.record_replacement()
+        if not cache.contains(address):
+            return
+        if self.take_line(address, source):
+            cache.mark_dirty(address)
+        self.handle_eviction(level, ret)
+
+    def insert_victim(self, address, level, dirty):
+        """
+        Insert an upper level's victim into the given level (exclusive hierarchy).
+        Victims of the last level go to main memory if dirty.
+        """
+        if level >= len(self.hierarchy.levels):
+            if dirty:
+                if self.contention:
+                    self.use_link(level, None, "write_back")
+                self.hierarchy.main_memory.write(address, self.current_cycle())
+            return
+        if self.contention:
+            self.use_link(level, None, "write_back")
+        self.fill_level(level, address, dirty=dirty)
 
     def write(self, address):
         """
@@ -84,11 +317,18 @@ class MemoryController:
             level: The cache level where the write-back needs to be written into.
             sync: If True, perform synchronous write-back; else asynchronous.
         """
-        if level >= len(self.hierarchy.levels):
-            return
-        
         if sync:
             self.time_tick()
+            self.fill_cycle = self.current_cycle()
+        else:
+            if level == self.record_level:
+                self.recorder.record(address, self.timestamp, is_write_back=True)
+            if self.contention:
+                self.use_link(level, None, "write_back")
+
+        if level >= len(self.hierarchy.levels):
+            self.hierarchy.main_memory.write(address, self.current_cycle())
+            return
 
         cache = self.hierarchy.levels[level]
         status = cache.write(address, self.timestamp)
@@ -103,6 +343,8 @@ class MemoryController:
 
             for lvl in range(level + 1, len(self.hierarchy.levels)):
                 cur_cache = self.hierarchy.levels[lvl]
+                if lvl == self.record_level:
+                    self.recorder.record(address, self.timestamp, is_write_back=False)
                 status = cur_cache.read(address, self.timestamp)
                 self.performance.record_cache_access(cur_cache.name, status)
                 if status == Status.HIT:
@@ -112,25 +354,168 @@ class MemoryController:
 
             if not cache_hit:
                 hit_level = len(self.hierarchy.levels)
+                if self.record_level == hit_level:
+                    self.recorder.record(address, self.timestamp, is_write_back=False)
+                self.hierarchy.main_memory.read(address, self.current_cycle())
                 self.performance.record_cache_access("MainMemory", None)
 
-            for lvl in range(hit_level - 1, level - 1, -1):
-                is_dirty, evicted, evicted_address, _ = self.hierarchy.levels[lvl].fill(address, self.timestamp)
-                self.performance.record_latency(self.hierarchy.levels[lvl].hit_latency)
-                if evicted:
-                    self.performance.record_replacement()
-                if is_dirty:
-                    self.handle_write_back(evicted_address, lvl + 1, sync=False)
+            if self.hierarchy.inclusion_policy == "Exclusive":
+                for lvl in range(hit_level - 1, level - 1, -1):
+                    self.performance.record_latency(self.hierarchy.levels[lvl].hit_latency)
+                    self.charge_fill_link(lvl, sync)
+                self.move_line(address, hit_level, level)
+            else:
+                for lvl in range(hit_level - 1, level - 1, -1):
+                    self.fill_level(lvl, address)
+                    self.performance.record_latency(self.hierarchy.levels[lvl].hit_latency)
+                    self.charge_fill_link(lvl, sync)
 
             # Now the line is in the cache at 'level', perform the write
             s = cache.write(address, self.timestamp)
             self.performance.record_cache_access(cache.name, s)
 
+    def charge_fill_link(self, level, sync):
+        """
+        Send the block filled into a level by a write miss over the link below it, on
+        the clock of the access like the fills of a read. The queueing delay only adds
+        to the latency of a program write.
+        """
+        link = self.hierarchy.links[level + 1] if self.contention else None
+        if link is None:
+            return
+        # A program write has recorded its latency so far, the current cycle includes it
+        cycle = max(self.current_cycle(), self.fill_cycle)
+        delay = link.transfer(cycle, "demand", self.current_cycle())
+        self.fill_cycle = cycle + delay + link.transfer_cycles
+        if sync:
+            self.performance.record_latency(delay)
+
+    def run_batch(self, batch):
+        """
+        Simulate a batch of decoded accesses.
+
+        Args:
+            batch: List of (is_write, address) tuples.
+        """
+        if self.hierarchy.translator is not None:
+            self.run_translated_batch(batch)
+            return
+        read = self.read
+        write = self.write
+        for is_write, address in batch:
+            if is_write:
+                write(address)
+            else:
+                read(address)
+
+    def run_translated_batch(self, batch):
+        """
+        Simulate a batch of decoded accesses whose addresses are virtual. Each address
+        is translated first, the translation latency is added to the access.
+        """
+        translate = self.hierarchy.translator.translate
+        for is_write, address in batch:
+            physical, latency = translate(address)
+            self.performance.record_latency(latency)
+            if is_write:
+                self.write(physical)
+            else:
+                self.read(physical)
+
+    def walk_read(self, address) -> int:
+        """
+        Read a page-table entry through the hierarchy for the page walker.
+        """
+        return self.read(address, tick=False, demand=False)
+
+    def replay_batch(self, batch):
+        """
+        Simulate a batch of requests from a filtered trace. The first level of this
+        hierarchy receives them the way it would from the recorded upper level.
+        Recorded addresses are physical, so no translation is applied.
+
+        Args:
+            batch: List of (flags, address) tuples, see controller/trace.py.
+        """
+        for flags, address in batch:
+            new_tick = flags & FLAG_NEW_TICK
+            if flags & FLAG_WRITE_BACK:
+                if new_tick:
+                    self.time_tick()
+                self.fill_cycle = self.current_cycle()
+                self.handle_write_back(address, 0, sync=False)
+            else:
+                self.read(address, tick=new_tick)
+
+    def finalize(self, warmup: int):
+        """
+        Gather the statistics kept by the caches and average them over the warmup passes.
+        """
+        self.collect_prefetch_information()
+        self.collect_bypass_information()
+        self.collect_miss_classification()
+        self.collect_miss_profiles()
+        self.collect_victim_cache_information()
+        self.collect_translation_information()
+        self.collect_main_memory_information()
+        self.collect_link_information()
+        self.calculate_AMAT(level=0)
+        self.performance.calculate_average_metrics(warmup)
+
     def collect_prefetch_information(self):
         for cache in self.hierarchy.levels:
             self.performance.prefetch_count += cache.prefetch_count
             self.performance.prefetch_miss_count += cache.prefetch_miss_count
+            throttle_stats = cache.prefetch_policy.get_stats()
+            if throttle_stats:
+                self.performance.prefetch_throttle[cache.name] = throttle_stats
+
+    def collect_bypass_information(self):
+        for cache in self.hierarchy.levels:
+            if cache.bypass_count > 0:
+                self.performance.bypass_stats[cache.name] = {
+                    "bypasses": cache.bypass_count,
+                    "bypass_reuses": cache.bypass_reuse_count,
+                }
+
+    def collect_miss_classification(self):
+        for cache in self.hierarchy.levels:
+            if cache.miss_classifier is not None:
+                self.performance.miss_classes[cache.name] = cache.miss_classifier.get_stats()
+
+    def collect_miss_profiles(self):
+        for cache in self.hierarchy.levels:
+            if cache.miss_profiler is not None:
+                self.performance.miss_profiles[cache.name] = cache.miss_profiler.get_stats()
+
+    def collect_victim_cache_information(self):
+        for cache in self.hierarchy.levels:
+            if cache.victim_cache is not None:
+                self.performance.victim_stats[cache.name] = cache.victim_cache.get_stats()
+
+    def collect_translation_information(self):
+        translator = self.hierarchy.translator
+        if translator is None:
+            return
+        for tlb in translator.tlbs:
+            self.performance.tlb_stats[tlb.name] = tlb.get_stats()
+        self.performance.page_walk_stats = translator.get_stats()
+
+    def collect_main_memory_information(self):
+        self.performance.main_memory_stats = self.hierarchy.main_memory.get_stats()
+
+    def collect_link_information(self):
+        for link in self.hierarchy.links:
+            if link is not None:
+                self.performance.link_stats[link.name] = link.get_stats(self.current_cycle())
     
+    def account_memory(self):
+        """
+        Store the footprint of the structures built so far, per level, and the peak
+        RSS of the process in the Performance.
+        """
+        self.performance.memory_stats = account_footprint(self.hierarchy)
+
     def calculate_AMAT(self, level: int) -> float:
         """
         Calculate the Average Memory Access Time (AMAT) up to a specified cache level.
@@ -146,7 +531,7 @@ class MemoryController:
         print(f"Level {level} Miss Rate: {miss_rate:.4f}")
         amat = self.hierarchy.levels[level].hit_latency + miss_rate * (
             self.hierarchy.bus_latencies[level] + 
-            (self.calculate_AMAT(level + 1) if level + 1 < len(self.hierarchy.levels) else self.hierarchy.main_memory_latency)
+            (self.calculate_AMAT(level + 1) if level + 1 < len(self.hierarchy.levels) else self.hierarchy.main_memory.get_average_latency())
         )
         self.performance.amat[self.hierarchy.levels[level].name] = amat
         return amat
@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import copy
+import io
+import json
+import os
+import socket
+from collections import OrderedDict
+from cache_simulator.controller.control import MemoryController
+from cache_simulator.controller.trace import decode_trace, is_filtered_trace, decode_filtered_trace, read_filtered_trace_passes
+
+# Per worker process caches, sized by init_worker
+_decoded_traces = OrderedDict()
+_snapshots = OrderedDict()
+_limits = {"traces": 4, "snapshots": 4}
+
+def init_worker(trace_cache, snapshot_cache):
+    _limits["traces"] = trace_cache
+    _limits["snapshots"] = snapshot_cache
+
+def lru_get(store, key):
+    value = store.get(key)
+    if value is not None:
+        store.move_to_end(key)
+    return value
+
+def lru_put(store, key, value, limit):
+    store[key] = value
+    store.move_to_end(key)
+    while len(store) > limit:
+        store.popitem(last=False)
+
+def load_trace(trace_file) -> tuple:
+    """
+    Decoded batches of a trace, from the worker's LRU cache when the file is unchanged.
+
+    Returns:
+        tuple: (filtered: bool, passes of a filtered trace or None, list of batches).
+    """
+    stat = os.stat(trace_file)
+    key = (trace_file, stat.st_size, stat.st_mtime_ns)
+    decoded = lru_get(_decoded_traces, key)
+    if decoded is None:
+        if is_filtered_trace(trace_file):
+            decoded = (True, read_filtered_trace_passes(trace_file), list(decode_filtered_trace(trace_file)))
+        else:
+            decoded = (False, None, list(decode_trace(trace_file)))
+        lru_put(_decoded_traces, key, decoded, _limits["traces"])
+    return decoded
+
+def run_passes(controller, decoded, passes) -> int:
+    """
+    Returns:
+        int: Number of passes simulated (a filtered trace holds its own).
+    """
+    filtered, recorded_passes, batches = decoded
+    if filtered:
+        for batch in batches:
+            controller.replay_batch(batch)
+        return recorded_passes
+    for _ in range(passes):
+        for batch in batches:
+            controller.run_batch(batch)
+    return passes
+
+def warmed_controller(config, warm_trace, warm_passes) -> MemoryController:
+    """
+    A controller whose caches went through warm_passes over warm_trace and whose
+    statistics are reset. Warmed states are kept as snapshots and deep-copied, so
+    every job starts from the same state.
+    """
+    stat = os.stat(warm_trace)
+    key = (json.dumps(config, sort_keys=True), warm_trace, stat.st_size, stat.st_mtime_ns, warm_passes)
+    snapshot = lru_get(_snapshots, key)
+    if snapshot is None:
+        snapshot = MemoryController(config=config)
+        run_passes(snapshot, load_trace(warm_trace), warm_passes)
+        snapshot.reset_stats()
+        lru_put(_snapshots, key, snapshot, _limits["snapshots"])
+    return copy.deepcopy(snapshot)
+
+def run_job(job) -> dict:
+    """
+    Simulate one job in a worker process.
+
+    Args:
+        job: {"config": parsed config, "trace": absolute path, "warmup": passes,
+            optionally "warm_trace", "warm_passes" and "memory_report"}.
+
+    Returns:
+        dict: Performance.to_dict() of the run.
+    """
+    if job.get("warm_trace"):
+        controller = warmed_controller(job["config"], job["warm_trace"], job.get("warm_passes", 1))
+    else:
+        controller = MemoryController(config=job["config"])
+    passes = run_passes(controller, load_trace(job["trace"]), job.get("warmup", 3))
+    # finalize prints the miss rates it computes, the daemon has no terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        controller.finalize(passes)
+    if job.get("memory_report"):
+        controller.account_memory()
+    return controller.performance.to_dict()
+
+def parse_address(address) -> tuple:
+    """
+    "host:port" is a TCP address, anything else a Unix socket path.
+
+    Returns:
+        tuple: ("tcp", host, port) or ("unix", path, None).
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return ("tcp", host, int(port))
+    return ("unix", address, None)
+
+class SimulationDaemon:
+    """
+    Resident simulation service.
+
+    Clients send newline-delimited JSON requests, {"id": ..., "job": {...}} (see
+    run_job), and get {"id": ..., "ok": true, "performance": {...}} or
+    {"id": ..., "ok": false, "error": "..."} back. The requests of one connection
+    run concurrently, responses are sent as jobs finish. {"command": "shutdown"}
+    stops the daemon.
+
+    Jobs run on a process pool. Every worker keeps an LRU cache of decoded traces
+    and of warmed controller snapshots, so repeated jobs skip decoding and warm-up.
+
+    Attributes:
+        address: "host:port" or Unix socket path to listen on.
+        workers: Number of worker processes.
+        trace_cache: Decoded traces kept per worker.
+        snapshot_cache: Warmed controller snapshots kept per worker.
+    """
+
+    def __init__(self, address, workers=2, trace_cache=4, snapshot_cache=4):
+        self.address = address
+        self.workers = workers
+        self.trace_cache = trace_cache
+        self.snapshot_cache = snapshot_cache
+        self.pool = None
+        self.stopped = None
+
+    def serve_forever(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        self.stopped = asyncio.Event()
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker, initargs=(self.trace_cache, self.snapshot_cache))
+        kind, host, port = parse_address(self.address)
+        if kind == "tcp":
+            server = await asyncio.start_server(self.handle, host, port)
+        else:
+            if os.path.exists(host):
+                os.remove(host)
+            server = await asyncio.start_unix_server(self.handle, host)
+        print(f"Simulation daemon listening on {self.address} with {self.workers} workers")
+        try:
+            async with server:
+                await self.stopped.wait()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if kind == "unix" and os.path.exists(host):
+                os.remove(host)
+
+    async def handle(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                await self.respond(writer, lock, {"id": None, "ok": False, "error": f"Invalid request: {e}"})
+                continue
+            if request.get("command") == "shutdown":
+                self.stopped.set()
+                break
+            tasks.append(asyncio.create_task(self.process(request, writer, lock)))
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+    async def process(self, request, writer, lock):
+        loop = asyncio.get_running_loop()
+        try:
+            performance = await loop.run_in_executor(self.pool, run_job, request["job"])
+            response = {"id": request.get("id"), "ok": True, "performance": performance}
+        except Exception as e:
+            response = {"id": request.get("id"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+        await self.respond(writer, lock, response)
+
+    async def respond(self, writer, lock, response):
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+class DaemonClient:
+    """
+    Thin blocking client of a SimulationDaemon.
+
+    Attributes:
+        address: "host:port" or Unix socket path of the daemon.
+    """
+
+    def __init__(self, address):
+        self.address = address
+
+    def connect(self) -> socket.socket:
+        kind, host, port = parse_address(self.address)
+        if kind == "tcp":
+            return socket.create_connection((host, port))
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(host)
+        return sock
+
+    def run(self, jobs) -> list:
+        """
+        Submit jobs, they run in parallel on the daemon's workers.
+
+        Returns:
+            list: Performance.to_dict() of every job, in order.
+
+        Raises:
+            RuntimeError: If a job failed on the daemon.
+        """
+        with self.connect() as sock, sock.makefile('rwb') as stream:
+            for i, job in enumerate(jobs):
+                stream.write(json.dumps({"id": i, "job": job}).encode() + b"\n")
+            stream.flush()
+            results = [None] * len(jobs)
+            for _ in jobs:
+                line = stream.readline()
+                if not line:
+                    raise RuntimeError("Simulation daemon closed the connection")
+                response = json.loads(line)
+                if not response["ok"]:
+                    raise RuntimeError(f"Simulation daemon job failed: {response['error']}")
+                results[response["id"]] = response["performance"]
+        return results
+
+    def shutdown(self):
+        with self.connect() as sock:
+            sock.sendall(json.dumps({"command": "shutdown"}).encode() + b"\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident cache simulation daemon")
+    parser.add_argument("--listen", type=str, default="/tmp/cache_simulator.sock", help="Unix socket path or host:port to listen on")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--trace-cache", type=int, default=4, help="Decoded traces kept in memory per worker")
+    parser.add_argument("--snapshot-cache", type=int, default=4, help="Warmed hierarchy snapshots kept in memory per worker")
+    parser.add_argument("--shutdown", action="store_true", help="Stop the daemon listening on --listen")
+    args = parser.parse_args()
+
+    if args.shutdown:
+        DaemonClient(args.listen).shutdown()
+        return
+    SimulationDaemon(args.listen, args.workers, args.trace_cache, args.snapshot_cache).serve_forever()
+
+if __name__ == "__main__":
+    main()
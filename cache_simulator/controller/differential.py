@@ -0,0 +1,287 @@
+import argparse
+import contextlib
+import copy
+import glob
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+from cache_simulator.controller.control import MemoryController
+from cache_simulator.controller.daemon import run_job
+from cache_simulator.controller.trace import decode_trace
+
+def load_engine(spec):
+    """
+    Import an engine class from a "package.module:Class" string.
+
+    An engine is built from a config path and offers the MemoryController interface
+    used here: run_batch(batch), finalize(warmup) and a Performance in .performance.
+    """
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Engine must be given as 'module:Class', got '{spec}'")
+    return getattr(importlib.import_module(module_name), attr)
+
+def generate_trace(kind, length, seed=0) -> list:
+    """
+    Synthetic access patterns that exercise the corner cases of the caches.
+
+    - "sequential": a stream over a footprint larger than the usual LLC.
+    - "stride": power-of-two strides, which pile up in few sets.
+    - "random": uniform accesses over a 16MB footprint.
+    - "mixed": a hot working set reused between cold random accesses.
+
+    About a quarter of the accesses are writes, so write-backs are exercised too.
+
+    Returns:
+        list: (is_write, address) tuples.
+    """
+    rng = random.Random(seed)
+    accesses = []
+    for i in range(length):
+        if kind == "sequential":
+            address = (i * 8) % (8 * 1024**2)
+        elif kind == "stride":
+            address = (i % 64) * 4096 + (i // 64 % 4) * 64 * 1024
+        elif kind == "random":
+            address = rng.randrange(16 * 1024**2) & ~7
+        elif kind == "mixed":
+            if rng.random() < 0.7:
+                address = rng.randrange(64 * 1024) & ~7
+            else:
+                address = rng.randrange(64 * 1024**2) & ~7
+        else:
+            raise ValueError(f"Unknown generated trace kind '{kind}'")
+        accesses.append((rng.random() < 0.25, address))
+    return accesses
+
+GENERATED_KINDS = ("sequential", "stride", "random", "mixed")
+
+def diff_counters(reference, candidate, path="") -> list:
+    """
+    Returns:
+        list: (counter path, reference value, candidate value) of every differing counter.
+    """
+    if isinstance(reference, dict) and isinstance(candidate, dict):
+        differences = []
+        for key in sorted(set(reference) | set(candidate), key=str):
+            differences += diff_counters(reference.get(key), candidate.get(key), f"{path}.{key}" if path else str(key))
+        return differences
+    if reference != candidate:
+        return [(path, reference, candidate)]
+    return []
+
+def finalized(controller, passes) -> dict:
+    # finalize prints the miss rates it computes, keep the harness output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        controller.finalize(passes)
+    return controller.performance.to_dict()
+
+class DifferentialHarness:
+    """
+    Runs a reference and a candidate engine side by side and compares every
+    Performance counter.
+
+    The engines are compared after every check_every accesses. When a check fails,
+    both engines are rebuilt, replayed up to the start of the failing chunk and then
+    stepped one access at a time, so the first diverging access is reported
+    exactly. Engines must therefore be deterministic. Counters that are only
+    gathered by finalize (prefetch, bypass, AMAT, ...) are compared at the end.
+
+    Attributes:
+        reference: Engine class whose behaviour is the golden one.
+        candidate: Engine class under test.
+        passes: Number of passes over each trace, as --warmup in main.py.
+        check_every: Accesses between two counter comparisons.
+    """
+
+    def __init__(self, candidate, reference=MemoryController, passes=2, check_every=1024):
+        self.reference = reference
+        self.candidate = candidate
+        self.passes = passes
+        self.check_every = check_every
+
+    def build(self, config_path):
+        return self.reference(config_path), self.candidate(config_path)
+
+    def compare(self, config_path, accesses):
+        """
+        Returns:
+            dict or None: The first divergence, None if both engines agree.
+            "access" is the index in the concatenated passes, None if only the
+            final statistics differ.
+        """
+        reference, candidate = self.build(config_path)
+        for start in range(0, len(accesses) * self.passes, self.check_every):
+            chunk = self.slice(accesses, start, start + self.check_every)
+            reference.run_batch(chunk)
+            candidate.run_batch(chunk)
+            if diff_counters(reference.performance.to_dict(), candidate.performance.to_dict()):
+                return self.locate(config_path, accesses, start)
+
+        differences = diff_counters(finalized(reference, self.passes), finalized(candidate, self.passes))
+        if differences:
+            return {"access": None, "differences": differences}
+        return None
+
+    def locate(self, config_path, accesses, start):
+        reference, candidate = self.build(config_path)
+        for offset in range(0, start, self.check_every):
+            prefix = self.slice(accesses, offset, min(offset + self.check_every, start))
+            reference.run_batch(prefix)
+            candidate.run_batch(prefix)
+        for index in range(start, min(start + self.check_every, len(accesses) * self.passes)):
+            access = accesses[index % len(accesses)]
+            reference.run_batch([access])
+            candidate.run_batch([access])
+            differences = diff_counters(reference.performance.to_dict(), candidate.performance.to_dict())
+            if differences:
+                return {
+                    "access": index,
+                    "pass": index // len(accesses),
+                    "is_write": access[0],
+                    "address": access[1],
+                    "differences": differences,
+                }
+        raise RuntimeError(f"Engines diverged before access {start + self.check_every} but not when replayed, they are not deterministic")
+
+    def slice(self, accesses, start, end) -> list:
+        """
+        Accesses [start, end) of the concatenated passes.
+        """
+        end = min(end, len(accesses) * self.passes)
+        chunk = []
+        while start < end:
+            offset = start % len(accesses)
+            take = min(end - start, len(accesses) - offset)
+            chunk += accesses[offset:offset + take]
+            start += take
+        return chunk
+
+def write_trace(accesses) -> str:
+    """
+    Write accesses to a temporary trace file, the caller removes it.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix=".trace", delete=False) as f:
+        for is_write, address in accesses:
+            f.write(f"{'w' if is_write else 'r'} {address:x}\n")
+    return f.name
+
+# Reported values that describe the state of a warmed hierarchy rather than count
+# events, they legitimately differ from those of a cold one
+STATE_COUNTERS = ("degree", "distance", "pages")
+
+def check_warm_snapshots(config_path, accesses, passes=1) -> list:
+    """
+    Jobs of the simulation daemon started from a warmed snapshot must not share any
+    state with the snapshot or with each other, and must not count anything from
+    the warm-up. The snapshot is warmed by the first half of the accesses folded
+    into 16KB, so the jobs build sets of the larger levels that the warm-up never
+    touched.
+
+    Two warmed jobs are run over all the accesses and compared with each other and
+    with a controller warmed and run in place. Right after its reset, that
+    controller must report the same counters as a cold one that ran nothing, so no
+    component keeps counts of the warm-up.
+
+    Returns:
+        list: (counter path, reference value, candidate value) of every difference, empty if isolated.
+    """
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    warm_accesses = [(is_write, address % (16 * 1024)) for is_write, address in accesses[:len(accesses) // 2]]
+    warm_file = write_trace(warm_accesses)
+    trace_file = write_trace(accesses)
+    try:
+        job = {"config": config, "trace": trace_file, "warmup": passes, "warm_trace": warm_file, "warm_passes": passes}
+        first = run_job(job)
+        second = run_job(job)
+
+        reference = MemoryController(config=config)
+        for _ in range(passes):
+            reference.run_batch(warm_accesses)
+        reference.reset_stats()
+        leaked = diff_counters(finalized(MemoryController(config=config), passes), finalized(copy.deepcopy(reference), passes))
+        leaked = [difference for difference in leaked if difference[0].rpartition(".")[2] not in STATE_COUNTERS]
+        for _ in range(passes):
+            reference.run_batch(accesses)
+        expected = finalized(reference, passes)
+    finally:
+        os.remove(warm_file)
+        os.remove(trace_file)
+    return leaked + diff_counters(first, second) + diff_counters(expected, first)
+
+def format_divergence(divergence, max_differences=10) -> str:
+    if divergence["access"] is None:
+        lines = ["DIVERGED in the final statistics"]
+    else:
+        operation = "w" if divergence["is_write"] else "r"
+        lines = [f"DIVERGED at access {divergence['access']} (pass {divergence['pass']}): {operation} {divergence['address']:#x}"]
+    for path, reference, candidate in divergence["differences"][:max_differences]:
+        lines.append(f"    {path}: reference={reference} candidate={candidate}")
+    if len(divergence["differences"]) > max_differences:
+        lines.append(f"    ... {len(divergence['differences']) - max_differences} more")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a candidate engine produces the same statistics as MemoryController")
+    parser.add_argument("--candidate", type=str, default="cache_simulator.controller.control:MemoryController", help="Engine under test, as 'module:Class'")
+    parser.add_argument("--reference", type=str, default="cache_simulator.controller.control:MemoryController", help="Golden engine, as 'module:Class'")
+    parser.add_argument("--config", type=str, nargs="*", default=None, help="Configurations to check (default: config/exp_*.json)")
+    parser.add_argument("--trace", type=str, nargs="*", default=None, help="Traces to check (default: traces/*.trace)")
+    parser.add_argument("--generated", type=int, default=20000, help="Accesses per generated trace, 0 disables them")
+    parser.add_argument("--limit", type=int, default=200000, help="Accesses read from each trace file")
+    parser.add_argument("--passes", type=int, default=2, help="Passes over every trace")
+    parser.add_argument("--check-every", type=int, default=1024, help="Accesses between two counter comparisons")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated traces")
+    parser.add_argument("--no-snapshots", action="store_true", help="Skip the isolation check of warmed daemon snapshots")
+    args = parser.parse_args()
+
+    configs = args.config if args.config is not None else sorted(glob.glob(os.path.join("config", "exp_*.json")))
+    trace_files = args.trace if args.trace is not None else sorted(glob.glob(os.path.join("traces", "*.trace")))
+    traces = []
+    if args.generated > 0:
+        for kind in GENERATED_KINDS:
+            traces.append((f"generated:{kind}", generate_trace(kind, args.generated, args.seed)))
+    for trace_file in trace_files:
+        accesses = []
+        for batch in decode_trace(trace_file):
+            accesses += batch
+            if len(accesses) >= args.limit:
+                break
+        traces.append((trace_file, accesses[:args.limit]))
+    if not configs or not traces:
+        parser.error("nothing to compare, no configuration or trace found")
+
+    harness = DifferentialHarness(load_engine(args.candidate), load_engine(args.reference), passes=args.passes, check_every=args.check_every)
+    failures = 0
+    for config_path in configs:
+        for trace_name, accesses in traces:
+            if not accesses:
+                continue
+            divergence = harness.compare(config_path, accesses)
+            if divergence is None:
+                print(f"OK        {config_path} x {trace_name} ({len(accesses)} accesses x {args.passes})")
+            else:
+                failures += 1
+                print(f"FAIL      {config_path} x {trace_name}: {format_divergence(divergence)}")
+    runs = len(configs) * len(traces)
+    if not args.no_snapshots and args.generated > 0:
+        # Warmed daemon jobs must give the same results as a controller warmed in place
+        accesses = generate_trace("mixed", args.generated, args.seed)
+        for config_path in configs:
+            runs += 1
+            differences = check_warm_snapshots(config_path, accesses)
+            if differences:
+                failures += 1
+                print(f"FAIL      {config_path} x warmed snapshots: {format_divergence({'access': None, 'differences': differences})}")
+            else:
+                print(f"OK        {config_path} x warmed snapshots")
+    print(f"{failures} of {runs} runs diverged")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
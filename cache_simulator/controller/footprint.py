@@ -0,0 +1,197 @@
+import sys
+import tracemalloc
+from collections import OrderedDict
+from cache_simulator.memory.line import Line, CompactLine
+from cache_simulator.memory.set import Set
+from cache_simulator.policy.eviction import LRU, SHiP
+from cache_simulator.policy.prefetch import Stream, StreamEntry, Stride, StrideEntry, ThrottledPrefetch
+from cache_simulator.policy.bypass import NoBypass, DeadBlockBypass
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, no RSS there
+    resource = None
+
+# Footprint categories of one cache level, in report order
+CATEGORIES = ("sets", "lines", "policy", "prefetcher", "other")
+
+_units = {}
+
+def measure(factory, count=256) -> float:
+    """
+    Average number of bytes allocated by factory(), measured with tracemalloc.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0] - before - sys.getsizeof(objects)
+    if not tracing:
+        tracemalloc.stop()
+    return max(allocated, 0) / count
+
+def unit_sizes() -> dict:
+    """
+    Bytes taken by one instance of every structure the caches are made of, measured
+    once per process so the numbers follow the running interpreter.
+    """
+    if not _units:
+        entries = 4096
+        integer = sys.getsizeof(1 << 32)
+        _units.update({
+            "int": integer,
+            # A line plus its slot in the set's list; its tag is an int of its own
+            "line": measure(Line) + 8 + integer,
+            "compact_line": measure(CompactLine) + 8 + integer,
+            "set": measure(lambda: Set(0, 0, 0, None, 0, None, lines=[])),
+            "dict_entry": sys.getsizeof(dict.fromkeys(range(1 << 20, (1 << 20) + entries))) / entries + integer,
+            "odict_entry": sys.getsizeof(OrderedDict.fromkeys(range(1 << 20, (1 << 20) + entries))) / entries + integer,
+            "ship_info": measure(lambda: [0, False]),
+            "stride_entry": measure(lambda: StrideEntry(1 << 32)) + 8,
+            "stream_entry": measure(lambda: StreamEntry(1 << 32, 1)) + 8,
+            "sampler_entry": sys.getsizeof(OrderedDict.fromkeys(range(1 << 20, (1 << 20) + entries))) / entries + integer + sys.getsizeof((0, False)),
+        })
+    return _units
+
+def prefetcher_bytes(policy) -> int:
+    units = unit_sizes()
+    if isinstance(policy, ThrottledPrefetch):
+        # Unused prefetched lines stay pending until filter_bits of them are tracked
+        return len(policy.pollution_filter) + policy.filter_bits * units["odict_entry"] + prefetcher_bytes(policy.policy)
+    if isinstance(policy, Stride):
+        return policy.max_entries * units["stride_entry"]
+    if isinstance(policy, Stream):
+        return policy.tabel_size * units["stream_entry"] + policy.history_limit * units["dict_entry"]
+    return 0
+
+def cache_footprint(cache, populated=False) -> dict:
+    """
+    Bytes used by one cache level, by category.
+
+    Args:
+        cache: The Cache to account for.
+        populated: Count the sets and entries actually built so far instead of the
+            state of a fully touched cache. Sets are built on first touch, so the
+            default is an upper bound of what a run can reach.
+
+    Returns:
+        dict: Bytes per category of CATEGORIES and their "total".
+    """
+    units = unit_sizes()
+    set_num = cache.index_function.set_num
+    line_bytes = units["compact_line"] if cache.line_class is CompactLine else units["line"]
+
+    if cache.skewed_lines is not None:
+        # No fixed sets, every line sits in the sparse array of its way
+        lines = sum(len(way) for way in cache.skewed_lines.ways) if populated else set_num * cache.associativity
+        sets = lines * units["dict_entry"]
+    else:
+        built = len(cache.sets) if populated else set_num
+        lines = built * cache.associativity
+        sets = built * (units["set"] + units["dict_entry"])
+
+    policy = cache.eviction_policy
+    if isinstance(policy, SHiP):
+        tracked = len(policy.line_info) if populated else lines
+        policy_bytes = policy.table_size * 8 + tracked * (units["ship_info"] + units["dict_entry"])
+    elif isinstance(policy, LRU):
+        # The last access timestamp of every line
+        policy_bytes = lines * units["int"]
+    else:
+        policy_bytes = 0
+
+    bypass = cache.bypass_policy
+    if isinstance(bypass, DeadBlockBypass):
+        if populated:
+            sampled = sum(len(sampler_set) for sampler_set in bypass.sampler.values())
+        else:
+            sampled = -(-set_num // bypass.sample_interval) * bypass.sampler_ways
+        policy_bytes += bypass.table_size * 8 + sampled * units["sampler_entry"]
+
+    other = 0
+    if not isinstance(bypass, NoBypass):
+        remembered = len(cache.bypassed_blocks) if populated else cache.bypass_window
+        other += remembered * units["odict_entry"]
+    if cache.miss_classifier is not None:
+        classifier = cache.miss_classifier
+        # The seen-block set grows with the trace footprint, one capacity is its floor
+        seen = len(classifier.seen) if populated else classifier.capacity
+        shadow = len(classifier.shadow) if populated else classifier.capacity
+        other += shadow * units["odict_entry"] + seen * units["dict_entry"]
+    if cache.miss_profiler is not None:
+        profiler = cache.miss_profiler
+        other += sys.getsizeof(profiler.set_accesses) + sys.getsizeof(profiler.set_misses)
+        counters = len(profiler.blocks.counts) if populated else profiler.blocks.capacity
+        other += counters * (units["dict_entry"] + units["ship_info"])
+    if cache.victim_cache is not None:
+        blocks = len(cache.victim_cache.blocks) if populated else cache.victim_cache.entries
+        other += blocks * units["odict_entry"]
+
+    footprint = {
+        "sets": int(sets),
+        "lines": int(lines * line_bytes),
+        "policy": int(policy_bytes),
+        "prefetcher": int(prefetcher_bytes(cache.prefetch_policy)),
+        "other": int(other),
+    }
+    footprint["total"] = sum(footprint.values())
+    return footprint
+
+def estimate_footprint(hierarchy) -> dict:
+    """
+    Projected footprint of a hierarchy once every set of every level is touched,
+    without simulating anything.
+
+    Returns:
+        dict: {"levels": {level id: cache_footprint}, "total": bytes}.
+    """
+    levels = {cache.name: cache_footprint(cache) for cache in hierarchy.levels}
+    return {"levels": levels, "total": sum(level["total"] for level in levels.values())}
+
+def peak_rss():
+    """
+    Returns:
+        int or None: Peak resident set size of the process in bytes, None where unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def account_footprint(hierarchy) -> dict:
+    """
+    Footprint of the structures a run actually built, per level, and the peak RSS
+    of the process.
+
+    Returns:
+        dict: {"levels": {level id: cache_footprint}, "total": bytes,
+            "peak_rss": bytes or None, "compact": bool}.
+    """
+    levels = {cache.name: cache_footprint(cache, populated=True) for cache in hierarchy.levels}
+    return {
+        "levels": levels,
+        "total": sum(level["total"] for level in levels.values()),
+        "peak_rss": peak_rss(),
+        "compact": hierarchy.compact,
+    }
+
+def format_bytes(size) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}" if unit != "B" else f"{size}B"
+        size /= 1024
+    return f"{size:.2f}GB"
+
+def format_footprint(footprint) -> list:
+    """
+    Returns:
+        list: Report lines, one row per level and a total row.
+    """
+    lines = [f"{'Level':<15} | " + " | ".join(f"{category.capitalize():<10}" for category in CATEGORIES + ("total",))]
+    lines.append("-" * len(lines[0]))
+    for level_id, level in footprint["levels"].items():
+        lines.append(f"{level_id:<15} | " + " | ".join(f"{format_bytes(level[category]):<10}" for category in CATEGORIES + ("total",)))
+    lines.append(f"{'Total':<15} | " + " | ".join(f"{'':<10}" for _ in CATEGORIES) + f" | {format_bytes(footprint['total']):<10}")
+    return lines
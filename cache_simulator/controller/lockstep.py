@@ -0,0 +1,63 @@
+from cache_simulator.controller.control import MemoryController
+from cache_simulator.controller.trace import decode_trace, is_filtered_trace, decode_filtered_trace, read_filtered_trace_passes
+
+class LockstepSimulator:
+    """
+    Simulate several configurations in one pass over a trace.
+
+    Each configuration gets its own MemoryController (hierarchy and Performance);
+    the trace is read and decoded once and every decoded batch is fed to all of them.
+
+    Attributes:
+        controllers: One MemoryController per configuration, in the given order.
+    """
+
+    def __init__(self, config_paths, compact=False):
+        self.controllers = [MemoryController(path, compact=compact) for path in config_paths]
+
+    def run(self, trace_file, warmup, batch_size=65536, monitor=None):
+        """
+        Run all configurations over the trace, see run_controllers.
+        """
+        run_controllers(self.controllers, trace_file, warmup, batch_size=batch_size, monitor=monitor)
+
+def run_controllers(controllers, trace_file, warmup, batch_size=65536, monitor=None):
+    """
+    Feed every pass over a trace to the controllers and finalize them. A single
+    simulation is the case of one controller.
+
+    Args:
+        controllers: MemoryControllers fed every decoded batch, in order.
+        trace_file: Path to the trace file.
+        warmup: Number of passes over the trace (ignored for filtered traces).
+        batch_size: Number of decoded accesses handed to each controller at a time.
+        monitor: Optional ProgressMonitor over the controllers, the run stops early
+            once every controller has converged.
+    """
+    stopped = False
+    if is_filtered_trace(trace_file):
+        # A filtered trace already contains every pass it was recorded from
+        warmup = read_filtered_trace_passes(trace_file)
+        for batch in decode_filtered_trace(trace_file, batch_size):
+            for controller in controllers:
+                controller.replay_batch(batch)
+            if monitor is not None and monitor.update(len(batch)):
+                stopped = True
+                break
+    else:
+        for _ in range(warmup):
+            for batch in decode_trace(trace_file, batch_size):
+                for controller in controllers:
+                    controller.run_batch(batch)
+                if monitor is not None and monitor.update(len(batch)):
+                    stopped = True
+                    break
+            if stopped:
+                break
+    for i, controller in enumerate(controllers):
+        if stopped:
+            # The counters cover the simulated prefix only, report it as a single pass
+            controller.performance.convergence = monitor.get_convergence(i)
+            controller.finalize(1)
+        else:
+            controller.finalize(warmup)
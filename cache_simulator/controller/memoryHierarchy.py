@@ -1,23 +1,62 @@
 import json
 from cache_simulator.memory.cache import Cache
+from cache_simulator.memory.interconnect import Interconnect
+from cache_simulator.memory.mainMemoryFactory import MainMemoryFactory
+from cache_simulator.memory.tlb import TLB
+from cache_simulator.memory.pageTable import PageAllocator, PageTable
+from cache_simulator.memory.translation import AddressTranslator
 
 class MemoryHierarchy:
     """
     Structure to represent the memory hierarchy levels.
-    
+
     Attributes:
         levels: List of Caches (e.g., L1, L2, L3).
-        bus_latencies: List of bus latencies between levels.
-        main_memory_latency: Latency of the main memory.
+        bus_latencies: List of bus latencies, bus_latencies[i] is the link into levels[i]
+            and bus_latencies[-1] is the link from the last level to main memory.
+        links: Interconnect bandwidth models, in the same order as bus_latencies, None
+            for links without "width" or "transfer_cycles".
+        main_memory: Main memory backend (constant latency or DRAM model).
+        inclusion_policy: "NINE", "Inclusive" or "Exclusive".
+        translator: AddressTranslator in front of the caches, None if the trace addresses are physical.
+        compact: Caches store their lines in the compact representation (see CompactLine).
     """
 
-    def __init__(self, file_path):
+    # Parameters of ThrottledPrefetch accepted in a "throttle" object
+    THROTTLE_KEYS = ("min_degree", "max_degree", "distance", "min_distance", "max_distance", "interval",
+                     "accuracy_high", "accuracy_low", "lateness_threshold", "pollution_threshold",
+                     "late_window", "filter_bits")
+    # Throttle parameters that are fractions, every other one is an int
+    THROTTLE_FRACTIONS = ("accuracy_high", "accuracy_low", "lateness_threshold", "pollution_threshold")
+
+    def __init__(self, file_path=None, config=None, compact=False):
+        """
+        Initializes the memory hierarchy from a JSON configuration file, or from an
+        already parsed configuration.
+        """
+        if config is None:
+            with open(file_path, 'r') as f:
+                config = json.load(f)
+        self.compact = compact
+        self.compile(config)
+
+    def compile(self, config):
         """
-        Initializes the memory hierarchy from a JSON configuration file.
+        Validate the configuration and build the hierarchy from it.
+
+        Everything that can be derived from the configuration (cache geometry,
+        address decode masks, the bus latency of every link) is computed here
+        once, so a broken configuration fails before the first access.
+
+        Args:
+            config (dict): Parsed configuration, see doc/config_fmt.md.
+
+        Raises:
+            ValueError: If the configuration does not follow the format.
         """
-        with open(file_path, 'r') as f:
-            config = json.load(f)
+        self.validate(config)
 
+        self.inclusion_policy = config.get("inclusion_policy", "NINE")
         self.cache_hierarchy = config["cache_hierarchy"]
         self.levels = []
         for cache_config in self.cache_hierarchy:
@@ -34,9 +73,209 @@ class MemoryHierarchy:
                 prefetch=prefetch_config,
                 bypass=bypass_config,
                 write_policy=cache_config["config"]["write_policy"],
-                write_allocate=cache_config["config"]["allocation_policy"]
+                write_allocate=cache_config["config"]["allocation_policy"],
+                classify_misses=cache_config["config"].get("miss_classification", False),
+                index_function=cache_config["config"].get("index_function", "modulo"),
+                victim_cache=cache_config["config"].get("victim_cache", None),
+                miss_profile=cache_config["config"].get("miss_profile", None),
+                compact=self.compact
             )
             self.levels.append(cache)
         self.interconnects = config["interconnects"]
-        self.bus_latencies = [interconnect["bus_latency"] for interconnect in self.interconnects]
-        self.main_memory_latency = config["main_memory"]["access_latency"]
\ No newline at end of file
+        self.bus_latencies = self.resolve_bus_latencies(self.interconnects)
+        self.links = self.build_links(self.interconnects)
+        self.main_memory = MainMemoryFactory(config["main_memory"], block_size=self.levels[-1].block_size)
+
+        if self.inclusion_policy == "Exclusive" and len({cache.block_size for cache in self.levels}) > 1:
+            raise ValueError("Exclusive inclusion policy requires the same block_size on every level")
+
+        self.translator = self.build_translator(config.get("translation", None))
+
+    def build_translator(self, translation):
+        """
+        Build the TLBs, page table and page allocator of the "translation" config object.
+
+        Returns:
+            AddressTranslator or None: None if translation is not configured.
+        """
+        if translation is None:
+            return None
+        tlbs = [TLB(tlb["id"], tlb["entries"], tlb["associativity"], tlb["hit_latency"]) for tlb in translation["tlbs"]]
+        allocator = PageAllocator(
+            Cache.parse_size_to_bytes(translation.get("physical_memory", "4GB")),
+            policy=translation.get("allocation", "sequential"),
+            seed=translation.get("seed", 0)
+        )
+        page_table = PageTable(Cache.parse_size_to_bytes(translation.get("page_size", "4KB")), allocator)
+        return AddressTranslator(tlbs, page_table)
+
+    def resolve_bus_latencies(self, interconnects) -> list:
+        """
+        Look up the link in front of every level by its "from"/"to" ids, so the
+        order of the "interconnects" array does not matter.
+
+        Returns:
+            list: [CPU->L1, L1->L2, ..., Ln->MainMemory] bus latencies.
+        """
+        links = {(ic["from"], ic["to"]): ic["bus_latency"] for ic in interconnects}
+        names = ["CPU"] + [cache.name for cache in self.levels] + ["MainMemory"]
+        bus_latencies = []
+        for src, dst in zip(names[:-1], names[1:]):
+            if (src, dst) not in links:
+                raise ValueError(f"Missing interconnect from '{src}' to '{dst}'")
+            bus_latencies.append(links[(src, dst)])
+        return bus_latencies
+
+    def build_links(self, interconnects) -> list:
+        """
+        Build the bandwidth model of every link that configures one. A link carries
+        the blocks of the level above it.
+
+        Returns:
+            list: [None (CPU->L1), L1->L2, ..., Ln->MainMemory] Interconnects or None.
+        """
+        configs = {(ic["from"], ic["to"]): ic for ic in interconnects}
+        names = ["CPU"] + [cache.name for cache in self.levels] + ["MainMemory"]
+        links = [None]
+        for i in range(1, len(names) - 1):
+            ic = configs[(names[i], names[i + 1])]
+            if "width" in ic or "transfer_cycles" in ic:
+                links.append(Interconnect(f"{names[i]}->{names[i + 1]}", self.levels[i - 1].block_size,
+                                          width=ic.get("width"), transfer_cycles=ic.get("transfer_cycles")))
+            else:
+                links.append(None)
+        return links
+
+    def validate(self, config):
+        """
+        Check the configuration against the format in doc/config_fmt.md.
+
+        Raises:
+            ValueError: Describing the first offending key.
+        """
+        def require(obj, key, expected_type, path):
+            full_key = f"{path}.{key}" if path else key
+            if not isinstance(obj, dict) or key not in obj:
+                raise ValueError(f"Missing required key '{full_key}'")
+            value = obj[key]
+            # bool is a subclass of int, never accept it as a number
+            if not isinstance(value, expected_type) or (expected_type is int and isinstance(value, bool)):
+                raise ValueError(f"'{full_key}' must be of type {expected_type.__name__}, got {type(value).__name__}")
+            return value
+
+        if not isinstance(config, dict):
+            raise ValueError("Configuration must be a JSON object")
+
+        caches = require(config, "cache_hierarchy", list, "")
+        if not caches:
+            raise ValueError("'cache_hierarchy' must contain at least one cache")
+        ids = set()
+        for i, cache_config in enumerate(caches):
+            path = f"cache_hierarchy[{i}]"
+            cache_id = require(cache_config, "id", str, path)
+            if cache_id in ids or cache_id in ("CPU", "MainMemory"):
+                raise ValueError(f"'{path}.id' must be unique and not 'CPU' or 'MainMemory', got '{cache_id}'")
+            ids.add(cache_id)
+            require(cache_config, "level", int, path)
+            params = require(cache_config, "config", dict, path)
+            path += ".config"
+            require(params, "size", str, path)
+            for key in ("associativity", "block_size", "hit_latency"):
+                if require(params, key, int, path) < (0 if key == "hit_latency" else 1):
+                    raise ValueError(f"'{path}.{key}' out of range: {params[key]}")
+            require(params, "replacement_policy", str, path)
+            if require(params, "write_policy", str, path) != "Write-Back":
+                raise ValueError(f"'{path}.write_policy' must be 'Write-Back', got '{params['write_policy']}'")
+            if require(params, "allocation_policy", str, path) != "Write-Allocate":
+                raise ValueError(f"'{path}.allocation_policy' must be 'Write-Allocate', got '{params['allocation_policy']}'")
+            if params.get("index_function", "modulo") not in ("modulo", "xor", "prime", "skewed"):
+                raise ValueError(f"'{path}.index_function' must be 'modulo', 'xor', 'prime' or 'skewed', got '{params['index_function']}'")
+            if not isinstance(params.get("miss_classification", False), bool):
+                raise ValueError(f"'{path}.miss_classification' must be of type bool")
+            miss_profile = params.get("miss_profile", False)
+            if not isinstance(miss_profile, (bool, dict)):
+                raise ValueError(f"'{path}.miss_profile' must be a bool or an object")
+            if isinstance(miss_profile, dict):
+                for key in ("top_n", "counters"):
+                    value = miss_profile.get(key, 1)
+                    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                        raise ValueError(f"'{path}.miss_profile.{key}' must be a positive int, got {value!r}")
+            victim_cache = params.get("victim_cache", None)
+            if victim_cache is not None:
+                if not isinstance(victim_cache, dict):
+                    raise ValueError(f"'{path}.victim_cache' must be an object")
+                entries = victim_cache.get("entries", 8)
+                if not isinstance(entries, int) or isinstance(entries, bool) or entries < 1:
+                    raise ValueError(f"'{path}.victim_cache.entries' must be a positive int, got {entries!r}")
+                if victim_cache.get("type", "victim") not in ("victim", "miss"):
+                    raise ValueError(f"'{path}.victim_cache.type' must be 'victim' or 'miss', got '{victim_cache['type']}'")
+            for key in ("prefetch", "bypass"):
+                if key in params and params[key] is not None and not isinstance(params[key], dict):
+                    raise ValueError(f"'{path}.{key}' must be an object")
+            throttle = (params.get("prefetch") or {}).get("throttle", None)
+            if throttle is not None:
+                if not isinstance(throttle, dict):
+                    raise ValueError(f"'{path}.prefetch.throttle' must be an object")
+                for key, value in throttle.items():
+                    if key not in self.THROTTLE_KEYS:
+                        raise ValueError(f"Unknown key '{path}.prefetch.throttle.{key}', expected one of {list(self.THROTTLE_KEYS)}")
+                    if key in self.THROTTLE_FRACTIONS:
+                        if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 1:
+                            raise ValueError(f"'{path}.prefetch.throttle.{key}' must be a number between 0 and 1, got {value!r}")
+                    else:
+                        # Distances may be 0, every other parameter is a count or a divisor
+                        minimum = 0 if key.endswith("distance") else 1
+                        if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+                            raise ValueError(f"'{path}.prefetch.throttle.{key}' must be an int >= {minimum}, got {value!r}")
+                # Bounds left out take the defaults of ThrottledPrefetch
+                for low, high, default_low, default_high in (("min_degree", "max_degree", 1, 16),
+                                                              ("min_distance", "max_distance", 0, 16),
+                                                              ("accuracy_low", "accuracy_high", .40, .75)):
+                    if throttle.get(low, default_low) > throttle.get(high, default_high):
+                        raise ValueError(f"'{path}.prefetch.throttle.{low}' must not exceed '{high}'")
+
+        for i, interconnect in enumerate(require(config, "interconnects", list, "")):
+            path = f"interconnects[{i}]"
+            src = require(interconnect, "from", str, path)
+            require(interconnect, "to", str, path)
+            require(interconnect, "bus_latency", int, path)
+            for key in ("width", "transfer_cycles"):
+                if key not in interconnect:
+                    continue
+                if src == "CPU":
+                    raise ValueError(f"'{path}.{key}' is not supported on the link from the CPU")
+                if require(interconnect, key, int, path) < 1:
+                    raise ValueError(f"'{path}.{key}' out of range: {interconnect[key]}")
+
+        if config.get("inclusion_policy", "NINE") not in ("NINE", "Inclusive", "Exclusive"):
+            raise ValueError(f"'inclusion_policy' must be 'NINE', 'Inclusive' or 'Exclusive', got '{config['inclusion_policy']}'")
+        if config.get("inclusion_policy", "NINE") == "Inclusive":
+            # Every line of a level must also be in the levels below it. A fill bypassed
+            # below, or a prefetch filled into an upper level only, would break that.
+            for i, cache_config in enumerate(caches):
+                path = f"cache_hierarchy[{i}].config"
+                params = cache_config["config"]
+                if i > 0 and (params.get("bypass") or {}).get("policy_name", "NoBypass") != "NoBypass":
+                    raise ValueError(f"'{path}.bypass' is not supported below the first level with the Inclusive inclusion policy")
+                if i < len(caches) - 1 and (params.get("prefetch") or {}).get("policy_name", "None") != "None":
+                    raise ValueError(f"'{path}.prefetch' is only supported on the last level with the Inclusive inclusion policy")
+
+        translation = config.get("translation", None)
+        if translation is not None:
+            if not isinstance(translation, dict):
+                raise ValueError("'translation' must be an object")
+            for i, tlb in enumerate(require(translation, "tlbs", list, "translation")):
+                path = f"translation.tlbs[{i}]"
+                require(tlb, "id", str, path)
+                for key in ("entries", "associativity", "hit_latency"):
+                    if require(tlb, key, int, path) < (0 if key == "hit_latency" else 1):
+                        raise ValueError(f"'{path}.{key}' out of range: {tlb[key]}")
+            page_size = translation.get("page_size", "4KB")
+            if not isinstance(page_size, str) or page_size.strip().upper() not in ("4KB", "2MB"):
+                raise ValueError(f"'translation.page_size' must be '4KB' or '2MB', got {page_size!r}")
+            if translation.get("allocation", "sequential") not in ("sequential", "random"):
+                raise ValueError(f"'translation.allocation' must be 'sequential' or 'random', got '{translation['allocation']}'")
+
+        main_memory = require(config, "main_memory", dict, "")
+        if main_memory.get("model", "Constant") == "Constant":
+            require(main_memory, "access_latency", int, "main_memory")
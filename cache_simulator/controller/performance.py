@@ -1,6 +1,7 @@
 import os
 import json
 from cache_simulator.controller.status import Status
+from cache_simulator.controller.footprint import format_bytes, format_footprint
 
 # ANSI color codes for terminal output
 RESET = "\033[0m"
@@ -22,6 +23,18 @@ class Performance:
         total_latency: Total latency of all accesses.
         cache_access_count: Dictionary mapping cache levels to their access counts.
         replacement_count: Number of replacements made.
+        back_invalidation_count: Number of upper-level lines invalidated by an inclusive lower level.
+        miss_classes: Per-level compulsory/capacity/conflict miss counts, for levels with miss classification.
+        miss_profiles: Per-level accesses and misses of every set and the most missing blocks, for profiled levels.
+        bypass_stats: Per-level bypass counts and bypassed blocks that were referenced again.
+        prefetch_throttle: Per-level degree and distance of throttled prefetchers, with the history of every interval.
+        victim_stats: Per-level hit/miss counts of the victim (or miss) cache, for levels that have one.
+        tlb_stats: Per-TLB hit/miss counts, empty without address translation.
+        page_walk_stats: Page walks, cycles spent walking and pages touched, empty without address translation.
+        main_memory_stats: Statistics reported by the main memory backend (empty for constant latency).
+        link_stats: Per-link transfers, bytes, utilization and queueing, for interconnects that model bandwidth.
+        memory_stats: Per-level footprint of the simulator's own structures and the peak RSS, empty unless requested.
+        convergence: Accesses simulated and confidence interval half-widths when the run stopped early, empty otherwise.
     """
     def __init__(self):
         self.access_count = 0
@@ -29,11 +42,35 @@ class Performance:
         self.hit_count = 0
         self.total_latency = 0
         self.replacement_count = 0
+        self.back_invalidation_count = 0
         self.prefetch_count = 0
         self.prefetch_miss_count = 0
         self.amat = {}
         self.level_stats = {}
+        self.miss_classes = {}
+        self.miss_profiles = {}
+        self.bypass_stats = {}
+        self.prefetch_throttle = {}
+        self.victim_stats = {}
+        self.tlb_stats = {}
+        self.page_walk_stats = {}
+        self.main_memory_stats = {}
+        self.link_stats = {}
+        self.memory_stats = {}
+        self.convergence = {}
     
+    def to_dict(self) -> dict:
+        """
+        All metrics as plain data, used to store results.
+        """
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        performance = cls()
+        performance.__dict__.update(data)
+        return performance
+
     def calculate_average_metrics(self, warmup: int):
         if warmup <= 0:
             return
@@ -42,12 +79,38 @@ class Performance:
         self.hit_count //= warmup
         self.total_latency //= warmup
         self.replacement_count //= warmup
+        self.back_invalidation_count //= warmup
         self.prefetch_count //= warmup
         self.prefetch_miss_count //= warmup
         for level in self.level_stats:
             self.level_stats[level]["accesses"] //= warmup
             self.level_stats[level]["hits"] //= warmup
             self.level_stats[level]["misses"] //= warmup
+        for level in self.miss_classes:
+            for kind in self.miss_classes[level]:
+                self.miss_classes[level][kind] //= warmup
+        for profile in self.miss_profiles.values():
+            profile["set_accesses"] = [count // warmup for count in profile["set_accesses"]]
+            profile["set_misses"] = [count // warmup for count in profile["set_misses"]]
+            profile["top_blocks"] = [[address, count // warmup, error // warmup] for address, count, error in profile["top_blocks"]]
+        for level in self.bypass_stats:
+            self.bypass_stats[level]["bypasses"] //= warmup
+            self.bypass_stats[level]["bypass_reuses"] //= warmup
+        for level in self.victim_stats:
+            self.victim_stats[level]["hits"] //= warmup
+            self.victim_stats[level]["misses"] //= warmup
+        for tlb in self.tlb_stats:
+            self.tlb_stats[tlb]["hits"] //= warmup
+            self.tlb_stats[tlb]["misses"] //= warmup
+        if self.page_walk_stats:
+            self.page_walk_stats["walks"] //= warmup
+            self.page_walk_stats["walk_cycles"] //= warmup
+        for key, value in self.main_memory_stats.items():
+            if isinstance(value, int):
+                self.main_memory_stats[key] //= warmup
+        for link in self.link_stats.values():
+            for key in ("demand", "prefetch", "write_back", "bytes", "busy_cycles", "queue_delay"):
+                link[key] //= warmup
     
     def record_access(self, hit: Status):
         self.access_count += 1
@@ -72,6 +135,9 @@ class Performance:
     def record_replacement(self):
         self.replacement_count += 1
 
+    def record_back_invalidation(self):
+        self.back_invalidation_count += 1
+
     def record_latency(self, latency: int):
         self.total_latency += latency
 
@@ -120,14 +186,23 @@ class Performance:
         lines.append(f"{c_label}Total Latency: {c_reset} {self.total_latency} cycles")
         lines.append(f"{c_label}Avg Latency:   {c_reset} {avg_latency:.2f} cycles/access")
         lines.append(f"{c_label}Total Replacements:{c_reset} {self.replacement_count}")
+        if self.back_invalidation_count:
+            lines.append(f"{c_label}Back Invalidations:{c_reset} {self.back_invalidation_count}")
         lines.append(f"{c_label}Prefetch Count:    {c_reset} {self.prefetch_count}")
         lines.append(f"{c_label}Prefetch Misses:   {c_reset} {self.prefetch_miss_count}")
+        if self.convergence:
+            half_widths = ", ".join(f"{level} \u00b1{width * 100:.3f}%" for level, width in self.convergence["half_width"].items())
+            lines.append(f"{c_warn}Stopped early after {self.convergence['accesses']} accesses ({self.convergence['batches']} batches), "
+                         f"95% CI of the miss rates: {half_widths}{c_reset}")
         
         # 3. Per-Level Breakdown
         lines.append(f"\n{c_header}[Per-Level Breakdown]{c_reset}")
         # Header for the table
-        lines.append(f"{'Level':<15} | {'Accesses':<10} | {'Hits':<10} | {'Misses':<10} | {'Miss Rate':<10} | {'AMAT':<10}")
-        lines.append("-" * 75)
+        header = f"{'Level':<15} | {'Accesses':<10} | {'Hits':<10} | {'Misses':<10} | {'Miss Rate':<10} | {'AMAT':<10}"
+        if self.miss_classes:
+            header += f" | {'Compulsory':<10} | {'Capacity':<10} | {'Conflict':<10}"
+        lines.append(header)
+        lines.append("-" * (75 + (39 if self.miss_classes else 0)))
 
         for level_id, stats in self.level_stats.items():
             accesses = stats["accesses"]
@@ -143,12 +218,148 @@ class Performance:
                 # Main Memory or Levels purely accessed via eviction/fill without status check
                 miss_rate_str = "N/A"
             
-            lines.append(f"{level_id:<15} | {accesses:<10} | {hits:<10} | {misses:<10} | {miss_rate_str:<10} | {amat_str:<10}")
+            row = f"{level_id:<15} | {accesses:<10} | {hits:<10} | {misses:<10} | {miss_rate_str:<10} | {amat_str:<10}"
+            if self.miss_classes:
+                classes = self.miss_classes.get(level_id)
+                if classes is not None:
+                    row += f" | {classes['compulsory']:<10} | {classes['capacity']:<10} | {classes['conflict']:<10}"
+                else:
+                    row += f" | {'N/A':<10} | {'N/A':<10} | {'N/A':<10}"
+            lines.append(row)
+
+        # 4. Bypass Section (only for levels that bypassed anything)
+        if self.bypass_stats:
+            lines.append(f"\n{c_header}[Bypass]{c_reset}")
+            lines.append(f"{'Level':<15} | {'Bypasses':<10} | {'Reused':<10} | {'Accuracy':<10}")
+            lines.append("-" * 54)
+            for level_id, stats in self.bypass_stats.items():
+                bypasses = stats["bypasses"]
+                reuses = stats["bypass_reuses"]
+                accuracy = f"{(1 - reuses / bypasses) * 100:.2f}%" if bypasses > 0 else "N/A"
+                lines.append(f"{level_id:<15} | {bypasses:<10} | {reuses:<10} | {accuracy:<10}")
+
+        # 5. Miss Profile Section (only for profiled levels)
+        if self.miss_profiles:
+            lines.append(f"\n{c_header}[Miss Profile]{c_reset}")
+            for level_id, profile in self.miss_profiles.items():
+                lines += self._format_miss_profile(level_id, profile, c_label, c_reset)
+
+        # 6. Prefetch Throttling Section (only for throttled prefetchers)
+        if self.prefetch_throttle:
+            lines.append(f"\n{c_header}[Prefetch Throttling]{c_reset}")
+            for level_id, stats in self.prefetch_throttle.items():
+                history = stats["history"]
+                lines.append(f"{c_label}{level_id}:{c_reset} degree {stats['degree']}, distance {stats['distance']} after {len(history)} intervals")
+                if history:
+                    avg_degree = sum(entry[1] for entry in history) / len(history)
+                    avg_accuracy = sum(entry[3] for entry in history) / len(history)
+                    lines.append(f"  Avg Degree: {avg_degree:.2f}, Avg Accuracy: {avg_accuracy * 100:.2f}%")
+                    # At most 32 points of the degree timeline
+                    step = max(1, len(history) // 32)
+                    timeline = " ".join(str(entry[1]) for entry in history[::step])
+                    lines.append(f"  Degree over time (every {step} intervals): {timeline}")
+
+        # 7. Victim Cache Section (only for levels with a victim or miss cache)
+        if self.victim_stats:
+            lines.append(f"\n{c_header}[Victim Cache]{c_reset}")
+            lines.append(f"{'Level':<15} | {'Lookups':<10} | {'Hits':<10} | {'Hit Rate':<10}")
+            lines.append("-" * 54)
+            for level_id, stats in self.victim_stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                hit_rate = f"{stats['hits'] / lookups * 100:.2f}%" if lookups > 0 else "N/A"
+                lines.append(f"{level_id:<15} | {lookups:<10} | {stats['hits']:<10} | {hit_rate:<10}")
+
+        # 8. Translation Section (only with address translation)
+        if self.tlb_stats:
+            lines.append(f"\n{c_header}[Translation]{c_reset}")
+            lines.append(f"{'TLB':<15} | {'Lookups':<10} | {'Hits':<10} | {'Misses':<10} | {'Miss Rate':<10}")
+            lines.append("-" * 67)
+            for tlb_id, stats in self.tlb_stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                miss_rate = f"{stats['misses'] / lookups * 100:.2f}%" if lookups > 0 else "N/A"
+                lines.append(f"{tlb_id:<15} | {lookups:<10} | {stats['hits']:<10} | {stats['misses']:<10} | {miss_rate:<10}")
+            walks = self.page_walk_stats["walks"]
+            avg_walk = self.page_walk_stats["walk_cycles"] / walks if walks > 0 else 0
+            lines.append(f"{c_label}Page Walks:        {c_reset} {walks}")
+            lines.append(f"{c_label}Walk Cycles:       {c_reset} {self.page_walk_stats['walk_cycles']} ({avg_walk:.2f} cycles/walk)")
+            lines.append(f"{c_label}Pages Touched:     {c_reset} {self.page_walk_stats['pages']}")
+
+        # 9. Main Memory Section (only for backends that report statistics)
+        if self.main_memory_stats:
+            mem = self.main_memory_stats
+            lines.append(f"\n{c_header}[Main Memory]{c_reset}")
+            lines.append(f"{c_label}Reads / Writes:    {c_reset} {mem['reads']} / {mem['writes']}")
+            lines.append(f"{c_label}Row Hits:          {c_reset} {mem['row_hits']} (empty: {mem['row_empty']}, conflicts: {mem['row_conflicts']})")
+            lines.append(f"{c_label}Row Hit Rate:      {c_reset} {mem['row_hit_rate'] * 100:.2f}%")
+            lines.append(f"{c_label}Bandwidth Util.:   {c_reset} {mem['bandwidth_utilization'] * 100:.2f}%")
+            lines.append(f"{c_label}Traffic:           {c_reset} {mem['bytes']} bytes")
+            lines.append(f"{c_label}Avg Latency:       {c_reset} {mem['avg_latency']:.2f} cycles")
+
+        # 10. Interconnect Section (only for links that model bandwidth)
+        if self.link_stats:
+            lines.append(f"\n{c_header}[Interconnect]{c_reset}")
+            lines.append(f"{'Link':<24} | {'Demand':<8} | {'Prefetch':<8} | {'WriteBack':<9} | {'Bytes':<12} | {'Util.':<7} | {'Avg Delay':<9} | {'Avg/Max Queue':<13}")
+            lines.append("-" * 113)
+            for name, link in self.link_stats.items():
+                transfers = link["demand"] + link["prefetch"] + link["write_back"]
+                avg_delay = link["queue_delay"] / transfers if transfers > 0 else 0
+                utilization = f"{link['utilization'] * 100:.2f}%"
+                queue = f"{link['avg_queue']:.2f} / {link['max_queue']}"
+                lines.append(f"{name:<24} | {link['demand']:<8} | {link['prefetch']:<8} | {link['write_back']:<9} | {link['bytes']:<12} | {utilization:<7} | {avg_delay:<9.2f} | {queue:<13}")
+
+        # 11. Memory Footprint Section (only when accounting was requested)
+        if self.memory_stats:
+            mem = self.memory_stats
+            lines.append(f"\n{c_header}[Memory Footprint]{c_reset}")
+            lines += format_footprint(mem)
+            representation = "compact" if mem["compact"] else "default"
+            lines.append(f"{c_label}Representation:    {c_reset} {representation}")
+            if mem["peak_rss"] is not None:
+                lines.append(f"{c_label}Peak RSS:          {c_reset} {format_bytes(mem['peak_rss'])} (whole process)")
         
         lines.append(f"{c_title}========================================{c_reset}\n")
         
         return "\n".join(lines)
     
+    def _format_miss_profile(self, level_id, profile, c_label="", c_reset="", top_sets=8) -> list:
+        set_accesses = profile["set_accesses"]
+        set_misses = profile["set_misses"]
+        total_misses = sum(set_misses)
+        lines = [f"{c_label}{level_id}:{c_reset} {total_misses} misses over {len(set_misses)} sets, "
+                 f"{sum(1 for misses in set_misses if misses)} sets with misses"]
+        if total_misses == 0:
+            return lines
+        ranked = sorted(range(len(set_misses)), key=lambda index: -set_misses[index])
+        hottest = max(1, len(set_misses) // 100)
+        hot_share = sum(set_misses[index] for index in ranked[:hottest]) / total_misses
+        lines.append(f"  Hottest 1% of sets ({hottest}) take {hot_share * 100:.2f}% of the misses, "
+                     f"max/mean set misses {set_misses[ranked[0]] / (total_misses / len(set_misses)):.2f}")
+        lines.append(f"  {'Set':<10} | {'Accesses':<10} | {'Misses':<10} | {'Miss Rate':<10} | {'Share':<10}")
+        for index in ranked[:top_sets]:
+            if set_misses[index] == 0:
+                break
+            miss_rate = f"{set_misses[index] / set_accesses[index] * 100:.2f}%" if set_accesses[index] else "N/A"
+            share = f"{set_misses[index] / total_misses * 100:.2f}%"
+            lines.append(f"  {index:<10} | {set_accesses[index]:<10} | {set_misses[index]:<10} | {miss_rate:<10} | {share:<10}")
+        lines.append(f"  {'Block':<18} | {'Misses':<10} | {'Error':<10} | {'Share':<10}")
+        for address, count, error in profile["top_blocks"]:
+            share = f"{count / total_misses * 100:.2f}%"
+            lines.append(f"  {address:<#18x} | {count:<10} | {error:<10} | {share:<10}")
+        return lines
+
+    def save_miss_profile_csv(self, file_path):
+        """
+        Write the miss profiles as CSV, one row per set and per hot block:
+        level,kind,key,accesses,misses,error (key is the set index or the block address).
+        """
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write("level,kind,key,accesses,misses,error\n")
+            for level_id, profile in self.miss_profiles.items():
+                for index, (accesses, misses) in enumerate(zip(profile["set_accesses"], profile["set_misses"])):
+                    f.write(f"{level_id},set,{index},{accesses},{misses},0\n")
+                for address, count, error in profile["top_blocks"]:
+                    f.write(f"{level_id},block,{address:#x},,{count},{error}\n")
+
     def print_stats(self):
         """Prints statistics to the terminal with colors."""
         print(self._get_formatted_stats(use_color=True))
@@ -177,4 +388,12 @@ class Performance:
                 f.write(content)
             print(f"{BOLD}{GREEN}Successfully saved detailed report to: {os.path.abspath(file_path)}{RESET}")
         except IOError as e:
-            print(f"{BOLD}{RED}Error saving report: {e}{RESET}")
\ No newline at end of file
+            print(f"{BOLD}{RED}Error saving report: {e}{RESET}")
+
+        if self.miss_profiles:
+            csv_path = os.path.join(output_dir, f"{trace_name}_{config_name}_miss_profile.csv")
+            try:
+                self.save_miss_profile_csv(csv_path)
+                print(f"{BOLD}{GREEN}Successfully saved miss profile to: {os.path.abspath(csv_path)}{RESET}")
+            except IOError as e:
+                print(f"{BOLD}{RED}Error saving miss profile: {e}{RESET}")
\ No newline at end of file
@@ -0,0 +1,130 @@
+import math
+import time
+
+# Two-sided 95% Student t quantiles by degrees of freedom, 1.96 beyond the table
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+class ProgressMonitor:
+    """
+    Live progress of a simulation and optional early stop on convergence.
+
+    The caller reports every simulated batch with update(). Progress lines (accesses
+    per second, percent done, current per-level miss rates) are printed every
+    interval seconds.
+
+    With a threshold, each batch is one sample of the batch-means method: the miss
+    rates of the first and last cache level inside the batch. Once at least
+    min_batches samples exist, the half-width of the 95% confidence interval of
+    their mean is compared to the threshold, and update() returns True when it is
+    below for both levels of every controller. The first batch is dropped, it is
+    dominated by cold misses.
+
+    Attributes:
+        controllers: MemoryControllers fed with the same batches.
+        labels: Name printed for each controller (None for a single controller).
+        total: Expected number of accesses of the whole run, 0 if unknown.
+        interval: Seconds between progress lines, 0 disables them.
+        threshold: Confidence interval half-width at which the run has converged, None to never stop early.
+        min_batches: Number of samples needed before convergence is checked.
+        done: Accesses simulated so far.
+    """
+
+    def __init__(self, controllers, total=0, interval=10.0, threshold=None, min_batches=10, labels=None):
+        self.controllers = controllers
+        self.labels = labels
+        self.total = total
+        self.interval = interval
+        self.threshold = threshold
+        self.min_batches = min_batches
+        self.done = 0
+        self.batches = 0
+        self.start = time.monotonic()
+        self.last_report = self.start
+        # Per controller: level name -> (accesses, misses) at the end of the previous batch
+        self.previous = [self.snapshot(controller) for controller in controllers]
+        # Per controller: level name -> list of batch miss rates
+        self.samples = [{name: [] for name in self.tracked_levels(controller)} for controller in controllers]
+
+    @staticmethod
+    def tracked_levels(controller) -> list:
+        levels = controller.hierarchy.levels
+        return [levels[0].name] if len(levels) == 1 else [levels[0].name, levels[-1].name]
+
+    def snapshot(self, controller) -> dict:
+        stats = controller.performance.level_stats
+        snapshot = {}
+        for name in self.tracked_levels(controller):
+            level = stats.get(name, {"accesses": 0, "misses": 0})
+            snapshot[name] = (level["accesses"], level["misses"])
+        return snapshot
+
+    def update(self, batch_len) -> bool:
+        """
+        Account for one simulated batch.
+
+        Returns:
+            bool: True if the miss rates have converged and the run can stop.
+        """
+        self.done += batch_len
+        self.batches += 1
+        converged = False
+        if self.threshold is not None:
+            converged = self.sample()
+
+        now = time.monotonic()
+        if self.interval > 0 and now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report(now)
+        return converged
+
+    def sample(self) -> bool:
+        converged = True
+        for i, controller in enumerate(self.controllers):
+            current = self.snapshot(controller)
+            for name, (accesses, misses) in current.items():
+                prev_accesses, prev_misses = self.previous[i][name]
+                if self.batches > 1 and accesses > prev_accesses:
+                    self.samples[i][name].append((misses - prev_misses) / (accesses - prev_accesses))
+                half_width = self.half_width(self.samples[i][name])
+                if half_width is None or half_width > self.threshold:
+                    converged = False
+            self.previous[i] = current
+        return converged
+
+    def half_width(self, samples):
+        """
+        Returns:
+            float or None: Half-width of the 95% confidence interval of the mean, None with too few samples.
+        """
+        n = len(samples)
+        if n < max(2, self.min_batches):
+            return None
+        mean = sum(samples) / n
+        variance = sum((x - mean) ** 2 for x in samples) / (n - 1)
+        t = T_95[n - 2] if n - 2 < len(T_95) else 1.96
+        return t * math.sqrt(variance / n)
+
+    def get_convergence(self, index=0) -> dict:
+        """
+        Convergence summary of one controller, stored in its Performance.
+        """
+        return {
+            "accesses": self.done,
+            "batches": self.batches,
+            "threshold": self.threshold,
+            "half_width": {name: self.half_width(samples) for name, samples in self.samples[index].items()},
+        }
+
+    def report(self, now):
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0
+        done = f"{self.done} accesses"
+        if self.total > 0:
+            done += f" ({min(100.0, self.done / self.total * 100):.1f}%)"
+        for i, controller in enumerate(self.controllers):
+            miss_rates = ", ".join(f"{cache.name} {controller.performance.get_miss_rate(cache.name) * 100:.2f}%"
+                                   for cache in controller.hierarchy.levels)
+            label = f"{self.labels[i]}: " if self.labels else ""
+            print(f"[progress] {label}{done}, {rate:,.0f} accesses/s, miss rates: {miss_rates}")
@@ -0,0 +1,137 @@
+import os
+import json
+import hashlib
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The driver runs the passes and shapes the stored numbers too
+MAIN_SCRIPT = os.path.join(os.path.dirname(PACKAGE_DIR), "main.py")
+
+def simulator_version() -> str:
+    """
+    Hash of the simulator sources and of main.py, so any code change invalidates
+    stored results.
+    """
+    digest = hashlib.sha256()
+    paths = []
+    for root, dirs, files in os.walk(PACKAGE_DIR):
+        dirs.sort()
+        paths += [os.path.join(root, name) for name in sorted(files) if name.endswith(".py")]
+    if os.path.exists(MAIN_SCRIPT):
+        paths.append(MAIN_SCRIPT)
+    for path in paths:
+        digest.update(os.path.relpath(path, PACKAGE_DIR).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def write_json(path, data):
+    """
+    Write a JSON file atomically: concurrent runs sharing the directory read either
+    the old or the new content, never a partial file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+class ResultCache:
+    """
+    Content-addressed store of simulation results.
+
+    An entry is keyed by the canonical JSON of the parsed config, the content hash of
+    the trace, the simulator version and the run options, so renaming or touching a
+    file does not invalidate it while any real change does. Entries are evicted least
+    recently used first once the store grows beyond max_bytes.
+
+    Attributes:
+        cache_dir: Directory holding one JSON file per entry.
+        max_bytes: Size bound of all entries together.
+    """
+
+    TRACE_INDEX = "trace_index.json"
+
+    def __init__(self, cache_dir=".result_cache", max_bytes=64 * 1024**2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, config: dict, trace_path: str, options: dict) -> str:
+        canonical = json.dumps({
+            "config": config,
+            "trace": self.trace_hash(trace_path),
+            "version": simulator_version(),
+            "options": options,
+        }, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def trace_hash(self, trace_path: str) -> str:
+        """
+        SHA-256 of the trace content. Hashes are remembered per (path, size, mtime)
+        so an unchanged trace is read only once.
+        """
+        index_path = os.path.join(self.cache_dir, self.TRACE_INDEX)
+        index = {}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r') as f:
+                    index = json.load(f)
+            except (IOError, ValueError):
+                index = {}
+
+        abs_path = os.path.abspath(trace_path)
+        stat = os.stat(abs_path)
+        entry = index.get(abs_path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        digest = hashlib.sha256()
+        with open(abs_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        index[abs_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        write_json(index_path, index)
+        return index[abs_path]["sha256"]
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def load(self, key: str):
+        """
+        Returns:
+            dict or None: The stored result, None on a miss.
+        """
+        path = self.entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+        except (IOError, ValueError):
+            return None
+        # Refresh the access time used for LRU eviction
+        os.utime(path)
+        return result
+
+    def store(self, key: str, result: dict):
+        write_json(self.entry_path(key), result)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the store fits in max_bytes.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json") or name == self.TRACE_INDEX:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
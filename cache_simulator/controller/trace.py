@@ -0,0 +1,121 @@
+import os
+import struct
+
+def decode_trace(trace_file, batch_size=65536):
+    """
+    Decode a trace file into batches of accesses.
+
+    Args:
+        trace_file: Path to the trace, one "<r|w> <hex address>" per line.
+        batch_size: Number of accesses per batch.
+
+    Yields:
+        list: Batch of (is_write: bool, address: int) tuples.
+    """
+    batch = []
+    with open(trace_file, 'r') as f:
+        for line in f:
+            parts = line.strip().split()
+            if len(parts) != 2:
+                continue
+            operation, address_str = parts
+            if operation == 'r':
+                batch.append((False, int(address_str, 16)))
+            elif operation == 'w':
+                batch.append((True, int(address_str, 16)))
+            else:
+                print(f"Unknown operation: {operation}")
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+# Filtered traces hold the requests leaving one cache level, in a compact binary form:
+# a header (magic, number of passes) followed by 9-byte records (flags, address).
+FILTERED_MAGIC = b"CSFT\x01"
+FILTERED_HEADER = struct.Struct("<5sI")
+FILTERED_RECORD = struct.Struct("<BQ")
+# The request is a dirty write-back (otherwise a read)
+FLAG_WRITE_BACK = 0x1
+# The request is the first one issued in its simulator tick
+FLAG_NEW_TICK = 0x2
+
+def is_filtered_trace(trace_file) -> bool:
+    with open(trace_file, 'rb') as f:
+        return f.read(len(FILTERED_MAGIC)) == FILTERED_MAGIC
+
+def read_filtered_trace_passes(trace_file) -> int:
+    """
+    Returns:
+        int: Number of passes over the original trace the filtered trace was recorded from.
+    """
+    with open(trace_file, 'rb') as f:
+        _, passes = FILTERED_HEADER.unpack(f.read(FILTERED_HEADER.size))
+    return passes
+
+def decode_filtered_trace(trace_file, batch_size=65536):
+    """
+    Decode a filtered trace into batches of requests.
+
+    Yields:
+        list: Batch of (flags: int, address: int) tuples.
+    """
+    with open(trace_file, 'rb') as f:
+        f.seek(FILTERED_HEADER.size)
+        while True:
+            data = f.read(FILTERED_RECORD.size * batch_size)
+            if not data:
+                break
+            yield list(FILTERED_RECORD.iter_unpack(data))
+
+def estimate_trace_length(trace_file, sample_bytes=1024 * 1024) -> int:
+    """
+    Number of accesses in a trace, exact for filtered traces and extrapolated from
+    the line length of the first sample_bytes for text traces.
+    """
+    size = os.path.getsize(trace_file)
+    if is_filtered_trace(trace_file):
+        return (size - FILTERED_HEADER.size) // FILTERED_RECORD.size
+    with open(trace_file, 'rb') as f:
+        sample = f.read(sample_bytes)
+    if not sample:
+        return 0
+    return round(size * sample.count(b"\n") / len(sample))
+
+class FilteredTraceWriter:
+    """
+    Writes the request stream leaving a cache level to a filtered trace.
+
+    Attributes:
+        passes: Number of passes over the original trace, stored in the header on close.
+        record_count: Number of records written.
+    """
+
+    def __init__(self, trace_file, buffer_records=65536):
+        self.file = open(trace_file, 'wb')
+        self.file.write(FILTERED_HEADER.pack(FILTERED_MAGIC, 0))
+        self.buffer = bytearray()
+        self.buffer_limit = buffer_records * FILTERED_RECORD.size
+        self.passes = 1
+        self.record_count = 0
+        self.last_timestamp = None
+
+    def record(self, address, timestamp, is_write_back):
+        flags = FLAG_WRITE_BACK if is_write_back else 0
+        if timestamp != self.last_timestamp:
+            flags |= FLAG_NEW_TICK
+            self.last_timestamp = timestamp
+        self.buffer += FILTERED_RECORD.pack(flags, address)
+        self.record_count += 1
+        if len(self.buffer) >= self.buffer_limit:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.seek(0)
+        self.file.write(FILTERED_HEADER.pack(FILTERED_MAGIC, self.passes))
+        self.file.close()
@@ -1,10 +1,34 @@
-import math
+from collections import OrderedDict
 from cache_simulator.memory.set import Set
+from cache_simulator.memory.line import Line, CompactLine
+from cache_simulator.memory.missClassifier import MissClassifier
+from cache_simulator.memory.victimCache import VictimCache
+from cache_simulator.memory.missProfiler import MissProfiler
+from cache_simulator.memory.indexFunction import ModuloIndex, XorIndex, PrimeIndex, SkewedIndex, SkewedSetTable
 from cache_simulator.controller.status import Status
 from cache_simulator.policy.evictionPolicyFactory import EvictionPolicyFactory
 from cache_simulator.policy.prefetchPolicyFactory import PrefetchPolicyFactory
 from cache_simulator.policy.bypassPolicyFactory import BypassPolicyFactory
 
+class SetTable(dict):
+    """
+    Sparse mapping from set index to Set.
+
+    A Set (and its lines) is only built the first time its index is looked up, so
+    building a huge cache costs nothing and memory follows the touched working set.
+    An untouched set holds no state, so hits, misses and evictions are the same as
+    with eagerly built sets.
+    """
+
+    def __init__(self, set_factory):
+        super().__init__()
+        self.set_factory = set_factory
+
+    def __missing__(self, index):
+        cache_set = self.set_factory(index)
+        self[index] = cache_set
+        return cache_set
+
 class Cache:
     """
     Structure of a cache.
@@ -23,10 +47,18 @@ class Cache:
         bypass: Dict to construct bypass policy
         write_policy: Policy used for writing data (e.g., write-back, write-through).
         allocate_policy: Policy for allocating on write misses (e.g., write-allocate, no-write-allocate).
-        sets: List of Set objects.
+        sets: SetTable of Set objects, built on first touch (None for skewed caches).
+        index_function: IndexFunction mapping block numbers to sets ("modulo", "xor", "prime" or "skewed").
+        skewed_lines: Per-way line storage of a skewed-associative cache, None otherwise.
+        eviction_handler: Optional callable receiving the fill result of prefetch fills that evict a line.
+        prefetch_handler: Optional callable called for every block a prefetch brings into this level.
+        miss_classifier: MissClassifier splitting demand misses into compulsory/capacity/conflict, None if disabled.
+        victim_cache: VictimCache beside the sets (victim or miss cache), None if not configured.
+        miss_profiler: MissProfiler counting misses per set and the most missing blocks, None if disabled.
+        line_class: CompactLine for the compact representation, Line otherwise.
     """
 
-    def __init__(self, name, cache_size, block_size, associativity, level, hit_latency, eviction_policy, prefetch, bypass ,write_policy, write_allocate):
+    def __init__(self, name, cache_size, block_size, associativity, level, hit_latency, eviction_policy, prefetch, bypass ,write_policy, write_allocate, classify_misses=False, index_function="modulo", victim_cache=None, miss_profile=None, compact=False):
         self.name = name
         self.cache_size = self.parse_size_to_bytes(cache_size)
         self.block_size = block_size
@@ -35,24 +67,105 @@ class Cache:
         self.hit_latency = hit_latency
         self.eviction_policy = EvictionPolicyFactory(eviction_policy)
         self.prefetch_policy = PrefetchPolicyFactory(prefetch)
-        self.bypass_policy = BypassPolicyFactory(bypass)
         self.write_policy = write_policy
         self.allocate_policy = write_allocate
+        if block_size & (block_size - 1) != 0:
+            raise ValueError(f"{name}: block_size must be a power of two, got {block_size}")
+        if self.cache_size % (block_size * associativity) != 0 or self.cache_size < block_size * associativity:
+            raise ValueError(f"{name}: size {self.cache_size}B is not a multiple of block_size * associativity ({block_size * associativity}B)")
         self.set_num = self.cache_size // (block_size * associativity)
-        self.offset_bits = int(math.log2(block_size))
-        self.index_bits = int(math.log2(self.set_num))
-        self.sets = [Set(index=i, associativity=associativity, block_size=block_size, eviction_plicy=self.eviction_policy, offset_bits=self.offset_bits, index_bits=self.index_bits) for i in range(self.set_num)]
+
+        # Address decode is fixed by the geometry, precompute it once.
+        # Plain indexing of a power-of-two set count uses bit slicing, everything
+        # else goes through the index function.
+        self.offset_bits = block_size.bit_length() - 1
+        self.offset_mask = block_size - 1
+        if index_function == "modulo":
+            self.index_function = ModuloIndex(self.set_num)
+        elif index_function == "xor":
+            self.index_function = XorIndex(self.set_num)
+        elif index_function == "prime":
+            self.index_function = PrimeIndex(self.set_num)
+        elif index_function == "skewed":
+            self.index_function = SkewedIndex(self.set_num, associativity)
+        else:
+            raise ValueError(f"{name}: unknown index function '{index_function}'")
+        # Prime indexing never reaches the sets above the prime, they are not part of the cache
+        self.set_num = self.index_function.set_num
+        if index_function == "modulo" and self.set_num & (self.set_num - 1) == 0:
+            self.index_bits = self.set_num.bit_length() - 1
+            self.index_mask = self.set_num - 1
+            self.tag_shift = self.offset_bits + self.index_bits
+        else:
+            self.index_bits = None
+            self.index_mask = None
+            self.tag_shift = None
+        self.bypass_policy = BypassPolicyFactory(bypass, set_num=self.set_num, associativity=associativity)
+        self.line_class = CompactLine if compact else Line
+        if index_function == "skewed":
+            self.sets = None
+            self.skewed_lines = SkewedSetTable(self.index_function, self.make_set, line_class=self.line_class)
+        else:
+            self.sets = SetTable(self.make_set)
+            self.skewed_lines = None
 
         self.prefetch_count = 0
         self.prefetch_miss_count = 0
+        self.eviction_handler = None
+        self.prefetch_handler = None
+
+        # Bypassed blocks are remembered for one cache capacity worth of bypasses,
+        # a miss on one of them means the bypass decision was wrong.
+        self.bypass_count = 0
+        self.bypass_reuse_count = 0
+        self.bypassed_blocks = OrderedDict()
+        self.bypass_window = self.index_function.set_num * associativity
+
+        self.miss_classifier = MissClassifier(self.index_function.set_num * associativity, self.offset_bits) if classify_misses else None
+        if miss_profile:
+            profile_config = miss_profile if isinstance(miss_profile, dict) else {}
+            self.miss_profiler = MissProfiler(self.set_num, self.offset_bits, top_n=profile_config.get("top_n", 16), counters=profile_config.get("counters", 256))
+        else:
+            self.miss_profiler = None
+        if victim_cache is not None:
+            self.victim_cache = VictimCache(victim_cache.get("entries", 8), victim_cache.get("type", "victim"), self.offset_bits)
+        else:
+            self.victim_cache = None
         
 
     def __repr__(self):
         return (f"Cache(level={self.level}, size={self.cache_size}B, block_size={self.block_size}B, "
                 f"associativity={self.associativity}, eviction_policy={self.eviction_policy})")
     
+    def make_set(self, index, lines=None) -> Set:
+        """
+        Build the Set at an index, on its first touch.
+
+        A bound method rather than a closure, so a deep copy of the cache (warmed
+        snapshots of the daemon) builds its new sets with its own eviction policy.
+        """
+        return Set(index=index, associativity=self.associativity, block_size=self.block_size, eviction_plicy=self.eviction_policy,
+                   offset_bits=self.offset_bits, index_function=self.index_function, lines=lines, line_class=self.line_class)
+
+    def reset_stats(self):
+        """
+        Zero the counters reported by this level and its components. The cached lines
+        and the state of the policies stay, so a warmed cache keeps its contents.
+        """
+        self.prefetch_count = 0
+        self.prefetch_miss_count = 0
+        self.bypass_count = 0
+        self.bypass_reuse_count = 0
+        self.prefetch_policy.reset_stats()
+        if self.miss_classifier is not None:
+            self.miss_classifier.reset_stats()
+        if self.miss_profiler is not None:
+            self.miss_profiler.reset_stats()
+        if self.victim_cache is not None:
+            self.victim_cache.reset_stats()
+
     def get_number_of_sets(self):
-        return len(self.sets)
+        return self.set_num
     
     def get_associativity(self):
         return self.associativity
@@ -70,30 +183,144 @@ class Cache:
         return self.level
     
     def read(self, address, timestamp) -> Status:
-        tag, index, offset = self.parse_address(address)
-        target_set: Set = self.sets[index]
+        tag, index, target_set = self.locate(address)
         status, is_prefetched = target_set.read_line(tag, timestamp)
+        if status == Status.MISS and self.victim_cache is not None and self.swap_in(address, tag, timestamp):
+            status, is_prefetched = Status.HIT, False
+        self.bypass_policy.on_access(address, index, tag)
+        if self.miss_classifier is not None:
+            self.miss_classifier.access(address, status == Status.MISS)
+        if self.miss_profiler is not None:
+            self.miss_profiler.access(index, address, status == Status.MISS)
         if status == Status.MISS:
+            if self.bypassed_blocks:
+                self.check_bypassed(address)
             self.handle_prefetch(address, timestamp, status)
         elif status == Status.HIT and is_prefetched:
             self.handle_prefetch(address, timestamp, status)
         return status
     
     def write(self, address, timestamp) -> Status:
-        tag, index, offset = self.parse_address(address)
-        target_set = self.sets[index]
-        return target_set.write_line(tag, timestamp)
+        tag, index, target_set = self.locate(address)
+        status = target_set.write_line(tag, timestamp)
+        if status == Status.MISS and self.victim_cache is not None and self.swap_in(address, tag, timestamp):
+            status = self.locate(address)[2].write_line(tag, timestamp)
+        if self.miss_classifier is not None:
+            self.miss_classifier.access(address, status == Status.MISS)
+        if self.miss_profiler is not None:
+            self.miss_profiler.access(index, address, status == Status.MISS)
+        # A write miss is filled and written again, only observe the access once
+        if status == Status.HIT:
+            self.bypass_policy.on_access(address, index, tag)
+        elif self.bypassed_blocks:
+            self.check_bypassed(address)
+        return status
 
     def fill(self, address, timestamp) -> tuple:
-        tag, index, offset = self.parse_address(address)
-        target_set = self.sets[index]
-        if self.bypass_policy.should_bypass(target_set, is_prefetch=False):
+        tag, index, target_set = self.locate(address, allocate=True)
+        if self.bypass_policy.should_bypass(target_set, is_prefetch=False, address=address):
+            self.record_bypass(address)
             return (False, False, 0, False)
         ret = target_set.fill_line(tag, timestamp)
         if ret[3]:
             self.prefetch_miss_count += 1
+        if self.victim_cache is not None:
+            if self.victim_cache.kind == "miss":
+                self.victim_cache.insert(address)
+            ret = self.retire(ret)
         return ret
 
+    def swap_in(self, address, tag, timestamp) -> bool:
+        """
+        Bring a block the sets missed on back from the victim cache.
+
+        Returns:
+            bool: True if the victim cache held the block, the access is then a hit of this level.
+        """
+        dirty = self.victim_cache.lookup(address)
+        if dirty is None:
+            return False
+        target_set = self.locate(address, allocate=True)[2]
+        ret = target_set.fill_line(tag, timestamp)
+        if dirty:
+            target_set.get_line(tag).dirty = True
+        if ret[3]:
+            self.prefetch_miss_count += 1
+        ret = self.retire(ret)
+        if ret[1] and self.eviction_handler is not None:
+            self.eviction_handler(ret)
+        return True
+
+    def retire(self, fill_result) -> tuple:
+        """
+        Move the line evicted from a set into the victim cache.
+
+        Returns:
+            tuple: Fill result describing the line that leaves the level, the one
+            pushed out of the victim cache (same format as Set.fill_line).
+        """
+        is_dirty, evicted, evicted_address, prefetch_miss = fill_result
+        if not evicted or self.victim_cache.kind != "victim":
+            return fill_result
+        pushed_out = self.victim_cache.insert(evicted_address, is_dirty)
+        if pushed_out is None:
+            return (False, False, 0, prefetch_miss)
+        return (pushed_out[1], True, pushed_out[0], prefetch_miss)
+
+    def record_bypass(self, address):
+        self.bypass_count += 1
+        self.bypassed_blocks[address >> self.offset_bits] = True
+        if len(self.bypassed_blocks) > self.bypass_window:
+            self.bypassed_blocks.popitem(last=False)
+
+    def check_bypassed(self, address):
+        """
+        Count a miss on a recently bypassed block as a wrong bypass decision.
+        """
+        if self.bypassed_blocks.pop(address >> self.offset_bits, None) is not None:
+            self.bypass_reuse_count += 1
+
+    def invalidate(self, address) -> tuple:
+        """
+        Drop the line holding the address, if any.
+
+        Returns:
+            tuple: (present: bool, dirty: bool)
+        """
+        tag, target_set = self.find(address)
+        present, dirty = target_set.invalidate_line(tag) if target_set is not None else (False, False)
+        if self.victim_cache is not None:
+            in_buffer, buffer_dirty = self.victim_cache.invalidate(address)
+            return (present or in_buffer, dirty or buffer_dirty)
+        return (present, dirty)
+
+    def contains(self, address) -> bool:
+        """
+        Returns:
+            bool: True if a valid line of this level holds the address.
+        """
+        tag, target_set = self.find(address)
+        if target_set is None:
+            return False
+        line = target_set.get_line(tag)
+        return line is not None and line.is_valid()
+
+    def mark_dirty(self, address) -> bool:
+        """
+        Mark the line holding the address as modified without counting an access.
+
+        Returns:
+            bool: False if the address is not cached here.
+        """
+        tag, target_set = self.find(address)
+        if target_set is None:
+            return False
+        line = target_set.get_line(tag)
+        if line is None or not line.is_valid():
+            return False
+        line.dirty = True
+        return True
+
     def parse_address(self, address):
         """
         Parse the given address into tag, index, and offset components.
@@ -104,15 +331,48 @@ class Cache:
         Returns:
             tuple: A tuple containing (tag, index, offset).
         """
-        # Placeholder for address parsing logic
-        mask_offset = self.block_size - 1
-        mask_index = self.set_num - 1
-        offset = address & mask_offset
-        index = (address >> self.offset_bits) & mask_index
-        tag = address >> (self.offset_bits + self.index_bits)
+        offset = address & self.offset_mask
+        if self.index_mask is not None:
+            index = (address >> self.offset_bits) & self.index_mask
+            tag = address >> self.tag_shift
+        else:
+            tag, index = self.index_function.split(address >> self.offset_bits)
         return tag, index, offset
+
+    def locate(self, address, allocate=False):
+        """
+        Find the set an address maps to.
+
+        Args:
+            address: The memory address.
+            allocate: The Set is about to be filled. A skewed cache only builds lines
+                for fills, lookups see an empty line in the ways holding none yet.
+
+        Returns:
+            tuple: (tag, index, Set). For a skewed cache the Set gathers the candidate
+            line of every way and index is the way-0 index. That Set is reused by the
+            next locate, it is only valid until then.
+        """
+        tag, index, offset = self.parse_address(address)
+        if self.skewed_lines is not None:
+            return tag, index, self.skewed_lines.candidates(tag, index, allocate)
+        return tag, index, self.sets[index]
+
+    def find(self, address):
+        """
+        Find the set an address maps to without building it, for the lookups that must
+        not allocate (invalidations, back-invalidations, dirty marking).
+
+        Returns:
+            tuple: (tag, Set or None), None if the set was never touched.
+        """
+        tag, index, offset = self.parse_address(address)
+        if self.skewed_lines is not None:
+            return tag, self.skewed_lines.candidates(tag, index)
+        return tag, self.sets.get(index)
         
-    def parse_size_to_bytes(self, size_str):
+    @staticmethod
+    def parse_size_to_bytes(size_str):
         """
         Parse strings like "32KB", "256MB", "8GB" and return the corresponding size in bytes.
         """
@@ -164,10 +424,23 @@ class Cache:
             True if count this prefetch(prefetch target address not in Set)
             False if not count this prefetch(prefetch target already in Set)
         """
-        tag, index, offset = self.parse_address(address)
-        target_set = self.sets[index]
-        if self.bypass_policy.should_bypass(target_set, is_prefetch=True):
-            return 
+        tag, index, target_set = self.locate(address)
+        if self.bypass_policy.should_bypass(target_set, is_prefetch=True, address=address):
+            if not target_set.contain_tag(tag):
+                self.record_bypass(address)
+            return
+        if self.victim_cache is not None and self.victim_cache.holds(address):
+            # Already in this level, the swap back happens on the demand access
+            return
         if not target_set.contain_tag(tag):
             self.prefetch_count += 1
-            target_set.fill_line(tag, timestamp, is_prefetch=True)
\ No newline at end of file
+            if self.skewed_lines is not None:
+                target_set = self.locate(address, allocate=True)[2]
+            ret = target_set.fill_line(tag, timestamp, is_prefetch=True)
+            self.prefetch_policy.on_prefetch_fill(address, ret[2] if ret[1] else None, self.block_size)
+            if self.prefetch_handler is not None:
+                self.prefetch_handler()
+            if self.victim_cache is not None:
+                ret = self.retire(ret)
+            if ret[1] and self.eviction_handler is not None:
+                self.eviction_handler(ret)
\ No newline at end of file
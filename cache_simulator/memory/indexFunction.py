@@ -0,0 +1,144 @@
+from cache_simulator.memory.line import Line
+
+class IndexFunction:
+    """
+    Maps a block number (address >> offset bits) to a (tag, set index) pair and back.
+
+    Attributes:
+        set_num: Number of sets the function maps to.
+    """
+
+    def __init__(self, set_num):
+        self.set_num = set_num
+
+    def split(self, block) -> tuple:
+        raise NotImplementedError("Split must be implemented in subclass")
+
+    def join(self, tag, index) -> int:
+        raise NotImplementedError("Join must be implemented in subclass")
+
+class ModuloIndex(IndexFunction):
+    """
+    Plain indexing: the set is the block number modulo the number of sets
+    (the low index bits for a power-of-two set count).
+    """
+
+    def split(self, block):
+        return divmod(block, self.set_num)
+
+    def join(self, tag, index):
+        return tag * self.set_num + index
+
+class XorIndex(IndexFunction):
+    """
+    The low index bits are XORed with every index-wide chunk of the tag, so
+    power-of-two strides spread over all sets. Needs a power-of-two set count.
+    """
+
+    def __init__(self, set_num):
+        super().__init__(set_num)
+        if set_num & (set_num - 1) != 0:
+            raise ValueError(f"XOR indexing needs a power-of-two number of sets, got {set_num}")
+        self.index_bits = set_num.bit_length() - 1
+        self.mask = set_num - 1
+
+    def fold(self, tag):
+        folded = 0
+        if self.index_bits == 0:
+            return folded
+        while tag:
+            folded ^= tag & self.mask
+            tag >>= self.index_bits
+        return folded
+
+    def split(self, block):
+        tag = block >> self.index_bits
+        return tag, (block & self.mask) ^ self.fold(tag)
+
+    def join(self, tag, index):
+        return (tag << self.index_bits) | (index ^ self.fold(tag))
+
+class PrimeIndex(ModuloIndex):
+    """
+    Modulo indexing by the largest prime not above the configured number of sets.
+    The sets above the prime stay unused.
+    """
+
+    def __init__(self, set_num):
+        prime = set_num
+        while prime > 2 and not self.is_prime(prime):
+            prime -= 1
+        super().__init__(prime)
+
+    @staticmethod
+    def is_prime(n):
+        if n < 2:
+            return False
+        i = 2
+        while i * i <= n:
+            if n % i == 0:
+                return False
+            i += 1
+        return True
+
+class SkewedIndex(IndexFunction):
+    """
+    Skewed-associative indexing: every way has its own hash, so two blocks that
+    collide in one way are unlikely to collide in the others. The full block
+    number is kept as tag, which makes rebuilding addresses trivial.
+    """
+
+    # Odd 64-bit multipliers, one hash per way
+    MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                   0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x85EBCA77C2B2AE63, 0x27D4EB2F165667C5)
+
+    def __init__(self, set_num, associativity):
+        super().__init__(set_num)
+        self.associativity = associativity
+
+    def way_index(self, block, way):
+        multiplier = self.MULTIPLIERS[way % len(self.MULTIPLIERS)] + 2 * (way // len(self.MULTIPLIERS))
+        mixed = (block * multiplier) & 0xFFFFFFFFFFFFFFFF
+        return (mixed ^ (mixed >> 29)) % self.set_num
+
+    def split(self, block):
+        return block, self.way_index(block, 0)
+
+    def join(self, tag, index):
+        return tag
+
+class SkewedSetTable:
+    """
+    Line storage of a skewed-associative cache: one sparse array of lines per way.
+
+    There is no fixed set; the candidates of a block are the lines at its hashed
+    index in every way, gathered into one Set that every access reuses. Lines are
+    only built for fills: a lookup sees a shared empty line in the ways that hold
+    nothing at the block's index yet, and lookups never fill.
+    """
+
+    def __init__(self, index_function, set_factory, line_class=Line):
+        self.index_function = index_function
+        self.set_factory = set_factory
+        self.line_class = line_class
+        self.ways = [{} for _ in range(index_function.associativity)]
+        self.empty_line = line_class()
+        self.view = None
+
+    def candidates(self, block, index, allocate=False):
+        lines = []
+        for way, way_lines in enumerate(self.ways):
+            way_index = self.index_function.way_index(block, way)
+            line = way_lines.get(way_index)
+            if line is None:
+                if allocate:
+                    line = way_lines[way_index] = self.line_class()
+                else:
+                    line = self.empty_line
+            lines.append(line)
+        if self.view is None:
+            self.view = self.set_factory(index, lines)
+        else:
+            self.view.index = index
+            self.view.lines = lines
+        return self.view
@@ -0,0 +1,116 @@
+import bisect
+
+class Interconnect:
+    """
+    Bandwidth-limited link between two adjacent levels.
+
+    The link moves one block at a time. A block occupies it for transfer_cycles,
+    which is block_size / width unless configured explicitly. A transfer is served
+    at the first time from its arrival at which the link is free for a whole
+    transfer; the wait is its queueing delay. Transfers arriving in cycle order are
+    thus served first come first served. A transfer stamped earlier than one already
+    queued (a write-back issued when its fill completes, after the next access's
+    fill) takes a free gap before it instead of waiting behind it.
+
+    The queue occupancy seen by each arriving transfer (transfers that arrived
+    before it and have not finished) is tracked too.
+
+    Attributes:
+        name: "<from>-><to>", used in the report.
+        block_size: Bytes moved per transfer (block size of the upper level).
+        transfer_cycles: Cycles the link is busy per block.
+        busy_until: Cycle at which the last scheduled transfer completes.
+        scheduled: (start, end, arrival) of the transfers that may still overlap new
+            arrivals, ordered by start.
+    """
+
+    KINDS = ("demand", "prefetch", "write_back")
+
+    def __init__(self, name, block_size, width=None, transfer_cycles=None):
+        self.name = name
+        self.block_size = block_size
+        if transfer_cycles is None:
+            transfer_cycles = -(-block_size // width)
+        self.transfer_cycles = transfer_cycles
+        self.busy_until = 0
+        self.scheduled = []
+
+        self.transfers = {kind: 0 for kind in self.KINDS}
+        self.busy_cycles = 0
+        self.queue_delay = 0
+        self.max_queue = 0
+        self.queue_sum = 0
+        self.first_cycle = 0
+
+    def transfer(self, cycle, kind, horizon=0) -> int:
+        """
+        Schedule one block transfer arriving at the given cycle.
+
+        Args:
+            cycle: Cycle at which the block is ready to be sent.
+            kind: "demand", "prefetch" or "write_back".
+            horizon: No later transfer arrives before this cycle, transfers finished
+                by then are forgotten.
+
+        Returns:
+            int: Cycles the transfer waited for the link.
+        """
+        scheduled = self.scheduled
+        if scheduled and scheduled[0][1] <= horizon:
+            scheduled[:] = [entry for entry in scheduled if entry[1] > horizon]
+
+        occupancy = 0
+        start = cycle
+        for begin, end, arrival in scheduled:
+            if arrival <= cycle < end:
+                occupancy += 1
+            # Scheduled transfers do not overlap, wait past each one in the way
+            if end > start and begin < start + self.transfer_cycles:
+                start = end
+        self.queue_sum += occupancy
+        if occupancy > self.max_queue:
+            self.max_queue = occupancy
+
+        end = start + self.transfer_cycles
+        bisect.insort(scheduled, (start, end, cycle))
+        if end > self.busy_until:
+            self.busy_until = end
+
+        self.transfers[kind] += 1
+        self.busy_cycles += self.transfer_cycles
+        delay = start - cycle
+        self.queue_delay += delay
+        return delay
+
+    def reset_stats(self, cycle):
+        """
+        Forget the statistics gathered so far, the scheduled transfers stay.
+
+        Args:
+            cycle: Current cycle, the start of the new measurement.
+        """
+        self.transfers = {kind: 0 for kind in self.KINDS}
+        self.busy_cycles = 0
+        self.queue_delay = 0
+        self.max_queue = 0
+        self.queue_sum = 0
+        self.first_cycle = cycle
+
+    def get_stats(self, cycles) -> dict:
+        """
+        Args:
+            cycles: Current cycle at the end of the run, used for the utilization.
+        """
+        transfers = sum(self.transfers.values())
+        elapsed = max(cycles, self.busy_until) - self.first_cycle
+        return {
+            "demand": self.transfers["demand"],
+            "prefetch": self.transfers["prefetch"],
+            "write_back": self.transfers["write_back"],
+            "bytes": transfers * self.block_size,
+            "busy_cycles": self.busy_cycles,
+            "queue_delay": self.queue_delay,
+            "utilization": self.busy_cycles / elapsed if elapsed > 0 else 0.0,
+            "avg_queue": self.queue_sum / transfers if transfers > 0 else 0.0,
+            "max_queue": self.max_queue,
+        }
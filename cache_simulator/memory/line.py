@@ -1,6 +1,6 @@
 from cache_simulator.controller.status import Status
 
-class Line:
+class BaseLine:
     """
     Structure of a cache line.
 
@@ -12,6 +12,8 @@ class Line:
         prefetched: Boolean, used to stats prefetch accuracy.
     """
 
+    __slots__ = ()
+
     def __init__(self):
         self.valid = False
         self.tag = None
@@ -65,3 +67,26 @@ class Line:
         self.valid = True
         self.dirty = False
         self.prefetched = is_prefetch
+
+    def invalidate(self):
+        """
+        Drop the content of the line, it becomes free for the next fill.
+        """
+        self.valid = False
+        self.tag = None
+        self.dirty = False
+        self.state = None
+        self.prefetched = False
+
+class Line(BaseLine):
+    """
+    Cache line keeping its attributes in an instance dictionary (default).
+    """
+
+class CompactLine(BaseLine):
+    """
+    Cache line with fixed attribute slots and no instance dictionary, about a third
+    smaller than Line. Used when a memory budget asks for the compact representation.
+    """
+
+    __slots__ = ("valid", "tag", "dirty", "state", "prefetched")
@@ -0,0 +1,219 @@
+class MainMemory:
+    """
+    Base class for main memory backends.
+
+    A backend sits behind the last cache level and answers block-sized
+    requests. The latency it returns is added to the access by the
+    MemoryController.
+
+    Attributes:
+        block_size: Size of a request in bytes (block size of the last cache level).
+    """
+
+    def __init__(self, block_size=64):
+        self.block_size = block_size
+
+    def read(self, address, cycle) -> int:
+        """
+        Serve a block read.
+
+        Args:
+            address: The memory address to read.
+            cycle: The cycle at which the request arrives at main memory.
+
+        Returns:
+            int: Latency of the request in cycles.
+        """
+        raise NotImplementedError("Read must be implemented in subclass")
+
+    def write(self, address, cycle) -> int:
+        """
+        Serve a block write (write-back from the last cache level).
+
+        Returns:
+            int: Latency of the request in cycles.
+        """
+        raise NotImplementedError("Write must be implemented in subclass")
+
+    def get_average_latency(self) -> float:
+        raise NotImplementedError("Get average latency must be implemented in subclass")
+
+    def get_stats(self) -> dict:
+        """
+        Statistics to be reported by Performance. Empty if the backend has nothing to report.
+        """
+        return {}
+
+    def reset_stats(self, cycle):
+        """
+        Forget the statistics gathered so far. The timing state stays, later requests
+        still arrive on the same clock.
+
+        Args:
+            cycle: Current cycle, the start of the new measurement.
+        """
+        pass
+
+class ConstantMemory(MainMemory):
+    """
+    Every access costs the same fixed latency.
+    """
+
+    def __init__(self, access_latency, block_size=64):
+        super().__init__(block_size)
+        self.access_latency = access_latency
+
+    def read(self, address, cycle):
+        return self.access_latency
+
+    def write(self, address, cycle):
+        return self.access_latency
+
+    def get_average_latency(self):
+        return self.access_latency
+
+class Bank:
+    """
+    State of a single DRAM bank.
+
+    Attributes:
+        open_row: Row currently held in the row buffer, None if precharged.
+        busy_until: Cycle at which the bank can accept the next command.
+    """
+
+    def __init__(self):
+        self.open_row = None
+        self.busy_until = 0
+
+class DRAM(MainMemory):
+    """
+    Banked DRAM with row buffers.
+
+    Address mapping is row:bank:channel:column, so consecutive blocks inside
+    one row stay in the same bank and streaming traffic hits the open row.
+    All timings are given in CPU cycles.
+
+    Attributes:
+        channels: Number of independent channels, each with its own data bus.
+        banks: Number of banks per channel.
+        row_size: Size of a row (row buffer) in bytes.
+        row_policy: "open" keeps the row open after an access, "closed" precharges immediately.
+        t_cas: Column access latency.
+        t_rcd: Row activate latency.
+        t_rp: Precharge latency.
+        t_burst: Data bus occupancy for one block transfer.
+    """
+
+    def __init__(self, channels=1, banks=8, row_size=2048, row_policy="open",
+                 t_cas=30, t_rcd=30, t_rp=30, t_burst=10, block_size=64):
+        super().__init__(block_size)
+        if row_policy not in ("open", "closed"):
+            raise ValueError(f"Unknown row buffer policy: {row_policy}")
+        self.channels = channels
+        self.banks = banks
+        self.row_size = row_size
+        self.row_policy = row_policy
+        self.t_cas = t_cas
+        self.t_rcd = t_rcd
+        self.t_rp = t_rp
+        self.t_burst = t_burst
+        self.bank_state = [[Bank() for _ in range(banks)] for _ in range(channels)]
+        self.channel_busy_until = [0] * channels
+
+        self.read_count = 0
+        self.write_count = 0
+        self.row_hits = 0
+        self.row_empty = 0
+        self.row_conflicts = 0
+        self.total_latency = 0
+        self.bus_busy_cycles = 0
+        self.first_cycle = 0
+        self.last_cycle = 0
+
+    def map_address(self, address):
+        """
+        Split an address into (channel, bank, row).
+        """
+        row_id = address // self.row_size
+        channel = row_id % self.channels
+        bank = (row_id // self.channels) % self.banks
+        row = row_id // (self.channels * self.banks)
+        return channel, bank, row
+
+    def read(self, address, cycle):
+        self.read_count += 1
+        return self.access(address, cycle)
+
+    def write(self, address, cycle):
+        self.write_count += 1
+        return self.access(address, cycle)
+
+    def access(self, address, cycle) -> int:
+        """
+        Schedule one block transfer and return its latency, including the
+        time spent waiting for a busy bank or data bus.
+        """
+        channel, bank_id, row = self.map_address(address)
+        bank = self.bank_state[channel][bank_id]
+
+        start = max(cycle, bank.busy_until)
+        if bank.open_row == row:
+            self.row_hits += 1
+            command_latency = self.t_cas
+        elif bank.open_row is None:
+            self.row_empty += 1
+            command_latency = self.t_rcd + self.t_cas
+        else:
+            self.row_conflicts += 1
+            command_latency = self.t_rp + self.t_rcd + self.t_cas
+
+        transfer_start = max(start + command_latency, self.channel_busy_until[channel])
+        done = transfer_start + self.t_burst
+        self.channel_busy_until[channel] = done
+        self.bus_busy_cycles += self.t_burst
+
+        if self.row_policy == "open":
+            bank.open_row = row
+            bank.busy_until = done
+        else:
+            bank.open_row = None
+            bank.busy_until = done + self.t_rp
+
+        self.last_cycle = max(self.last_cycle, done)
+        latency = done - cycle
+        self.total_latency += latency
+        return latency
+
+    def get_average_latency(self):
+        accesses = self.read_count + self.write_count
+        if accesses == 0:
+            return self.t_rcd + self.t_cas + self.t_burst
+        return self.total_latency / accesses
+
+    def reset_stats(self, cycle):
+        self.read_count = 0
+        self.write_count = 0
+        self.row_hits = 0
+        self.row_empty = 0
+        self.row_conflicts = 0
+        self.total_latency = 0
+        self.bus_busy_cycles = 0
+        self.first_cycle = cycle
+        self.last_cycle = max(self.last_cycle, cycle)
+
+    def get_stats(self):
+        accesses = self.read_count + self.write_count
+        row_hit_rate = self.row_hits / accesses if accesses > 0 else 0.0
+        elapsed = self.last_cycle - self.first_cycle
+        utilization = self.bus_busy_cycles / (elapsed * self.channels) if elapsed > 0 else 0.0
+        return {
+            "reads": self.read_count,
+            "writes": self.write_count,
+            "row_hits": self.row_hits,
+            "row_empty": self.row_empty,
+            "row_conflicts": self.row_conflicts,
+            "bytes": accesses * self.block_size,
+            "row_hit_rate": row_hit_rate,
+            "bandwidth_utilization": utilization,
+            "avg_latency": self.get_average_latency(),
+        }
@@ -0,0 +1,30 @@
+from cache_simulator.memory.mainMemory import *
+
+def MainMemoryFactory(config, block_size=64):
+    """
+    Factory function to create the main memory backend from the "main_memory" config object.
+
+    Args:
+        config (dict): The "main_memory" object of the configuration file.
+        block_size (int): Block size of the last cache level.
+
+    Returns:
+        MainMemory: An instance of the corresponding backend.
+    """
+    model = config.get("model", "Constant")
+    if model == "Constant":
+        return ConstantMemory(config["access_latency"], block_size=block_size)
+    elif model == "DRAM":
+        return DRAM(
+            channels=config.get("channels", 1),
+            banks=config.get("banks", 8),
+            row_size=config.get("row_size", 2048),
+            row_policy=config.get("row_policy", "open"),
+            t_cas=config.get("t_cas", 30),
+            t_rcd=config.get("t_rcd", 30),
+            t_rp=config.get("t_rp", 30),
+            t_burst=config.get("t_burst", 10),
+            block_size=block_size
+        )
+    else:
+        raise ValueError(f"Unknown main memory model: {model}")
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+
+class MissClassifier:
+    """
+    3C classification of the misses of one cache level.
+
+    - Compulsory: the block was never accessed before (seen-block set).
+    - Capacity: a fully associative LRU cache of the same capacity misses too.
+    - Conflict: every other miss, caused by the limited associativity.
+
+    The fully associative shadow is an OrderedDict used as an LRU list, so lookup,
+    promotion and eviction are O(1) whatever the capacity.
+
+    Attributes:
+        capacity: Number of blocks in the cache (and in the shadow).
+        offset_bits: log2 of the block size.
+        seen: Set of every block number accessed so far.
+        shadow: Fully associative LRU shadow, ordered from LRU to MRU.
+    """
+
+    def __init__(self, capacity, offset_bits):
+        self.capacity = capacity
+        self.offset_bits = offset_bits
+        self.seen = set()
+        self.shadow = OrderedDict()
+        self.compulsory = 0
+        self.capacity_misses = 0
+        self.conflict = 0
+
+    def access(self, address, is_miss):
+        """
+        Update the shadow with a demand access and classify it if the real cache missed.
+
+        Args:
+            address: The accessed memory address.
+            is_miss: The real cache missed on this access.
+        """
+        block = address >> self.offset_bits
+        in_shadow = block in self.shadow
+        if is_miss:
+            if block not in self.seen:
+                self.compulsory += 1
+            elif not in_shadow:
+                self.capacity_misses += 1
+            else:
+                self.conflict += 1
+        # Hits count as seen too, the block may have been brought in by a prefetch
+        self.seen.add(block)
+
+        if in_shadow:
+            self.shadow.move_to_end(block)
+        else:
+            self.shadow[block] = True
+            if len(self.shadow) > self.capacity:
+                self.shadow.popitem(last=False)
+
+    def reset_stats(self):
+        """
+        Zero the miss counts, the seen blocks and the shadow are cache state and stay.
+        """
+        self.compulsory = 0
+        self.capacity_misses = 0
+        self.conflict = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "compulsory": self.compulsory,
+            "capacity": self.capacity_misses,
+            "conflict": self.conflict,
+        }
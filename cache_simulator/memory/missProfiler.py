@@ -0,0 +1,95 @@
+import heapq
+from array import array
+
+class SpaceSaving:
+    """
+    Space-saving heavy hitters (Metwally et al.): the most frequent keys of a stream
+    with a fixed number of counters.
+
+    When a new key arrives and every counter is taken, the key replaces the one
+    with the smallest count and inherits it as overestimation error. Any key with
+    a true count above total / capacity is guaranteed to be kept.
+
+    The smallest counter is found through a heap with lazy deletion, so an update
+    is O(log capacity) amortized.
+
+    Attributes:
+        capacity: Number of counters.
+        counts: key -> [count, error].
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.heap = []
+
+    def add(self, key):
+        entry = self.counts.get(key)
+        if entry is not None:
+            entry[0] += 1
+        elif len(self.counts) < self.capacity:
+            entry = self.counts[key] = [1, 0]
+        else:
+            # Pop stale heap entries until the current minimum is found
+            while True:
+                count, victim = heapq.heappop(self.heap)
+                victim_entry = self.counts.get(victim)
+                if victim_entry is not None and victim_entry[0] == count:
+                    break
+            del self.counts[victim]
+            entry = self.counts[key] = [count + 1, count]
+        heapq.heappush(self.heap, (entry[0], key))
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(entry[0], key) for key, entry in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def top(self, n) -> list:
+        """
+        Returns:
+            list: [key, count, error] of the n largest counters, largest first.
+        """
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1][0], item[0]))
+        return [[key, count, error] for key, (count, error) in ranked[:n]]
+
+class MissProfiler:
+    """
+    Where the misses of one cache level come from.
+
+    Demand accesses and misses are counted per set in two compact integer arrays,
+    and the missing block addresses go through a space-saving sketch, so memory is
+    bounded by the number of sets and counters whatever the trace length.
+
+    Attributes:
+        set_num: Number of sets of the cache.
+        offset_bits: log2 of the block size.
+        top_n: Number of missing blocks reported.
+        set_accesses: Demand accesses per set.
+        set_misses: Demand misses per set.
+        blocks: SpaceSaving sketch of the missing block numbers.
+    """
+
+    def __init__(self, set_num, offset_bits, top_n=16, counters=256):
+        self.set_num = set_num
+        self.offset_bits = offset_bits
+        self.top_n = top_n
+        self.set_accesses = array('Q', bytes(8 * set_num))
+        self.set_misses = array('Q', bytes(8 * set_num))
+        self.blocks = SpaceSaving(max(counters, top_n))
+
+    def access(self, index, address, is_miss):
+        self.set_accesses[index] += 1
+        if is_miss:
+            self.set_misses[index] += 1
+            self.blocks.add(address >> self.offset_bits)
+
+    def reset_stats(self):
+        self.set_accesses = array('Q', bytes(8 * self.set_num))
+        self.set_misses = array('Q', bytes(8 * self.set_num))
+        self.blocks = SpaceSaving(self.blocks.capacity)
+
+    def get_stats(self) -> dict:
+        return {
+            "set_accesses": self.set_accesses.tolist(),
+            "set_misses": self.set_misses.tolist(),
+            "top_blocks": [[block << self.offset_bits, count, error] for block, count, error in self.blocks.top(self.top_n)],
+        }
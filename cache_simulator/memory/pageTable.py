@@ -0,0 +1,125 @@
+import random
+
+class PageAllocator:
+    """
+    Synthetic physical memory allocator handing out page frames on first touch.
+
+    Physical memory is carved into 2MB chunks. A 2MB page takes a whole chunk, 4KB
+    frames (small pages and page-table pages) are taken from the current partially
+    used chunk.
+
+    - "sequential": chunks and frames are handed out in address order, like a
+      freshly booted machine.
+    - "random": chunks are drawn uniformly from the free ones and the frames of a
+      chunk are shuffled, like a long-running fragmented machine. Deterministic
+      for a given seed.
+
+    Attributes:
+        chunk_num: Number of 2MB chunks in physical memory.
+        policy: "sequential" or "random".
+        rng: Random generator of the "random" policy.
+    """
+
+    CHUNK_SIZE = 2 * 1024**2
+    FRAME_SIZE = 4 * 1024
+
+    def __init__(self, physical_memory, policy="sequential", seed=0):
+        if policy not in ("sequential", "random"):
+            raise ValueError(f"Unknown page allocation policy '{policy}', expected 'sequential' or 'random'")
+        self.chunk_num = physical_memory // self.CHUNK_SIZE
+        if self.chunk_num < 1:
+            raise ValueError(f"Physical memory must be at least 2MB, got {physical_memory}B")
+        self.policy = policy
+        self.rng = random.Random(seed)
+        self.used_chunks = 0
+        # Sparse Fisher-Yates permutation of the chunk numbers, position -> chunk
+        self.permutation = {}
+        self.free_frames = []
+
+    def allocate_chunk(self) -> int:
+        """
+        Returns:
+            int: Physical base address of a free 2MB chunk.
+        """
+        if self.used_chunks >= self.chunk_num:
+            raise RuntimeError(f"Out of physical memory ({self.chunk_num} chunks of 2MB allocated)")
+        i = self.used_chunks
+        if self.policy == "random":
+            j = self.rng.randrange(i, self.chunk_num)
+            chunk = self.permutation.get(j, j)
+            self.permutation[j] = self.permutation.pop(i, i)
+        else:
+            chunk = i
+        self.used_chunks += 1
+        return chunk * self.CHUNK_SIZE
+
+    def allocate_frame(self) -> int:
+        """
+        Returns:
+            int: Physical base address of a free 4KB frame.
+        """
+        if not self.free_frames:
+            base = self.allocate_chunk()
+            frames = [base + i * self.FRAME_SIZE for i in range(self.CHUNK_SIZE // self.FRAME_SIZE)]
+            if self.policy == "random":
+                self.rng.shuffle(frames)
+            # Frames are popped from the end
+            frames.reverse()
+            self.free_frames = frames
+        return self.free_frames.pop()
+
+class PageTable:
+    """
+    x86-64 style four-level radix page table (9 index bits per level, 48-bit
+    virtual addresses). With 2MB pages the walk stops at the third level.
+
+    Table pages and data pages are allocated on first touch, page faults cost nothing.
+
+    Attributes:
+        page_size: 4KB or 2MB.
+        page_bits: log2 of the page size.
+        walk_levels: Number of page-table entries read by a walk.
+        allocator: PageAllocator providing the frames.
+        nodes: (depth, address prefix) -> physical address of the table page.
+        mappings: Virtual page number -> physical frame address.
+    """
+
+    LEVELS = 4
+    INDEX_BITS = 9
+    ENTRY_SIZE = 8
+    VA_BITS = 48
+
+    def __init__(self, page_size, allocator: PageAllocator):
+        if page_size not in (PageAllocator.FRAME_SIZE, PageAllocator.CHUNK_SIZE):
+            raise ValueError(f"Page size must be 4KB or 2MB, got {page_size}B")
+        self.page_size = page_size
+        self.page_bits = page_size.bit_length() - 1
+        self.walk_levels = self.LEVELS - (self.page_bits - 12) // self.INDEX_BITS
+        self.allocator = allocator
+        self.nodes = {}
+        self.mappings = {}
+
+    def walk(self, address) -> tuple:
+        """
+        Translate a virtual address through the radix tree.
+
+        Returns:
+            tuple: (frame address, [physical addresses of the entries read, root first]).
+        """
+        entries = []
+        for depth in range(self.walk_levels):
+            key = (depth, address >> (self.VA_BITS - self.INDEX_BITS * depth))
+            node = self.nodes.get(key)
+            if node is None:
+                node = self.nodes[key] = self.allocator.allocate_frame()
+            index = (address >> (self.VA_BITS - self.INDEX_BITS * (depth + 1))) & ((1 << self.INDEX_BITS) - 1)
+            entries.append(node + index * self.ENTRY_SIZE)
+        vpn = address >> self.page_bits
+        frame = self.mappings.get(vpn)
+        if frame is None:
+            if self.page_size == PageAllocator.CHUNK_SIZE:
+                frame = self.allocator.allocate_chunk()
+            else:
+                frame = self.allocator.allocate_frame()
+            self.mappings[vpn] = frame
+        return frame, entries
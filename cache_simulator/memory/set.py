@@ -11,17 +11,19 @@ class Set:
         associativity: Number of lines per set.
         eviction_policy: Eviction policy applied to this set.
         offset_bits: Number of bits for block offset.
-        index_bits: Number of bits for set index.
+        index_function: IndexFunction of the cache, needed to rebuild addresses from tags.
+        line_class: Line or CompactLine, class of the lines the set builds.
     """
 
-    def __init__(self, index, associativity, block_size, eviction_plicy: EvictionPolicy, offset_bits, index_bits):
+    def __init__(self, index, associativity, block_size, eviction_plicy: EvictionPolicy, offset_bits, index_function, lines=None, line_class=Line):
         self.index = index
         self.associativity = associativity
         self.block_size = block_size
         self.eviction_policy = eviction_plicy
         self.offset_bits = offset_bits
-        self.index_bits = index_bits
-        self.lines = [Line() for _ in range(associativity)]
+        self.index_function = index_function
+        # Skewed caches pass the candidate lines of one block instead of owning lines
+        self.lines = lines if lines is not None else [line_class() for _ in range(associativity)]
 
     def __repr__(self):
         return f"Set(associativity={self.associativity}, lines={self.lines})"
@@ -70,6 +72,7 @@ class Set:
 
         Returns:
             tuple: (is_dirty: bool, evicted: bool, evicted_line_address: int, prefetch_miss: bool)
+            evicted_line_address is 0 if nothing was evicted.
         """
         for line in self.lines:
             if not line.is_valid():
@@ -80,13 +83,25 @@ class Set:
         evicted_line = self.eviction_policy.evict(self)
         prefetch_miss = evicted_line.prefetched
         evicted_address = self.get_address_of_line(evicted_line)
-        self.eviction_policy.on_fill(self, evicted_line, timestamp=timestamp)
+        # Line.fill clears the dirty bit, read it before refilling
+        is_dirty = evicted_line.is_dirty()
         evicted_line.fill(tag, is_prefetch)
-        if evicted_line.is_dirty():
-            evicted_line.dirty = False
-            return (True, True, evicted_address, prefetch_miss)
-        else:
-            return (False, True, 0, prefetch_miss)
+        self.eviction_policy.on_fill(self, evicted_line, timestamp=timestamp)
+        return (is_dirty, True, evicted_address, prefetch_miss)
+
+    def invalidate_line(self, tag) -> tuple:
+        """
+        Invalidate the line with the given tag.
+
+        Returns:
+            tuple: (present: bool, dirty: bool)
+        """
+        for line in self.lines:
+            if line.is_valid() and line.get_tag() == tag:
+                dirty = line.is_dirty()
+                line.invalidate()
+                return (True, dirty)
+        return (False, False)
         
     def get_address_of_line(self, line: Line) -> int:
         """
@@ -101,8 +116,7 @@ class Set:
         tag = line.get_tag()
         index = self.index
         offset = 0  # Assuming offset is 0 for the start of the block
-        address = (tag << (self.index_bits + self.offset_bits)) + \
-                  (index << self.offset_bits) + offset
+        address = (self.index_function.join(tag, index) << self.offset_bits) + offset
         return address
         
     def contain_tag(self, tag) -> bool:
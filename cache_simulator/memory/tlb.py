@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+class TLB:
+    """
+    Set-associative LRU translation lookaside buffer.
+
+    Entries map a virtual page number to a physical frame address. Every set is an
+    OrderedDict used as an LRU list, so lookup, promotion and eviction are O(1).
+
+    Attributes:
+        name: Name of the TLB, used in the report.
+        entries: Total number of entries.
+        associativity: Number of entries per set.
+        hit_latency: Latency of a lookup in cycles.
+        set_num: Number of sets (entries // associativity).
+        sets: List of OrderedDict(vpn -> frame), ordered from LRU to MRU.
+    """
+
+    def __init__(self, name, entries, associativity, hit_latency):
+        if entries % associativity != 0:
+            raise ValueError(f"{name}: entries ({entries}) must be a multiple of associativity ({associativity})")
+        self.name = name
+        self.entries = entries
+        self.associativity = associativity
+        self.hit_latency = hit_latency
+        self.set_num = entries // associativity
+        self.sets = [OrderedDict() for _ in range(self.set_num)]
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, vpn):
+        """
+        Returns:
+            int or None: The frame address of the page, None on a miss.
+        """
+        entries = self.sets[vpn % self.set_num]
+        frame = entries.get(vpn)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entries.move_to_end(vpn)
+        return frame
+
+    def fill(self, vpn, frame):
+        entries = self.sets[vpn % self.set_num]
+        entries[vpn] = frame
+        entries.move_to_end(vpn)
+        if len(entries) > self.associativity:
+            entries.popitem(last=False)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,71 @@
+from cache_simulator.memory.pageTable import PageTable
+
+class AddressTranslator:
+    """
+    Virtual to physical translation in front of the cache hierarchy.
+
+    The TLBs are looked up in order, each lookup costs its hit latency. A hit fills
+    the TLBs above it, a miss in every TLB walks the page table and fills all of them.
+    The page-table entries read by the walk are sent through the data caches with
+    walk_read, so walks compete with the program's data and their latency depends
+    on where the entries are cached.
+
+    Attributes:
+        tlbs: List of TLBs, first level first.
+        page_table: PageTable mapping virtual pages to physical frames.
+        walk_read: Callable reading one physical address through the hierarchy and
+            returning its latency, set by the MemoryController.
+        walks: Number of page walks.
+        walk_cycles: Cycles spent in page walks.
+    """
+
+    def __init__(self, tlbs, page_table: PageTable):
+        self.tlbs = tlbs
+        self.page_table = page_table
+        self.page_bits = page_table.page_bits
+        self.offset_mask = page_table.page_size - 1
+        self.walk_read = None
+        self.walks = 0
+        self.walk_cycles = 0
+
+    def translate(self, address) -> tuple:
+        """
+        Returns:
+            tuple: (physical address, translation latency in cycles).
+        """
+        vpn = address >> self.page_bits
+        offset = address & self.offset_mask
+        latency = 0
+        for level, tlb in enumerate(self.tlbs):
+            latency += tlb.hit_latency
+            frame = tlb.lookup(vpn)
+            if frame is not None:
+                for upper in self.tlbs[:level]:
+                    upper.fill(vpn, frame)
+                return frame | offset, latency
+
+        frame, entries = self.page_table.walk(address)
+        walk_latency = 0
+        for entry in entries:
+            walk_latency += self.walk_read(entry)
+        self.walks += 1
+        self.walk_cycles += walk_latency
+        for tlb in self.tlbs:
+            tlb.fill(vpn, frame)
+        return frame | offset, latency + walk_latency
+
+    def reset_stats(self):
+        """
+        Zero the walk counts and those of the TLBs, the mappings stay.
+        """
+        self.walks = 0
+        self.walk_cycles = 0
+        for tlb in self.tlbs:
+            tlb.reset_stats()
+
+    def get_stats(self) -> dict:
+        return {
+            "walks": self.walks,
+            "walk_cycles": self.walk_cycles,
+            "pages": len(self.page_table.mappings),
+        }
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+class VictimCache:
+    """
+    Small fully associative LRU buffer beside one cache level (Jouppi).
+
+    - "victim": lines evicted from the cache are kept in the buffer. A miss that
+      hits the buffer swaps the line back into its set, the line it replaces takes
+      its place in the buffer. Only lines pushed out of the buffer leave the level.
+    - "miss": every demand fill is copied into the buffer as well. A miss that hits
+      the buffer is refilled from it and the copy stays. Copies are always clean,
+      the cache keeps the modified data.
+
+    Blocks are indexed by an OrderedDict used as an LRU list, so lookup, insertion
+    and eviction are O(1) whatever the number of entries.
+
+    Attributes:
+        entries: Number of blocks the buffer holds.
+        kind: "victim" or "miss".
+        offset_bits: log2 of the block size of the cache level.
+        blocks: block number -> dirty, ordered from LRU to MRU.
+    """
+
+    def __init__(self, entries, kind, offset_bits):
+        if kind not in ("victim", "miss"):
+            raise ValueError(f"Unknown victim cache type '{kind}', expected 'victim' or 'miss'")
+        self.entries = entries
+        self.kind = kind
+        self.offset_bits = offset_bits
+        self.blocks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, address):
+        """
+        Look up a block the cache missed on.
+
+        Returns:
+            bool or None: Dirty bit of the block to swap back, None on a buffer miss.
+        """
+        block = address >> self.offset_bits
+        if block not in self.blocks:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.kind == "victim":
+            return self.blocks.pop(block)
+        self.blocks.move_to_end(block)
+        return False
+
+    def insert(self, address, dirty=False):
+        """
+        Insert a block as most recently used.
+
+        Returns:
+            tuple or None: (address, dirty) of the block pushed out of the buffer, if any.
+        """
+        block = address >> self.offset_bits
+        if block in self.blocks:
+            self.blocks[block] = self.blocks[block] or dirty
+            self.blocks.move_to_end(block)
+            return None
+        self.blocks[block] = dirty
+        if len(self.blocks) > self.entries:
+            evicted, evicted_dirty = self.blocks.popitem(last=False)
+            return (evicted << self.offset_bits, evicted_dirty)
+        return None
+
+    def holds(self, address) -> bool:
+        """
+        A victim buffer holds the only copy of its blocks, a miss buffer holds duplicates.
+        """
+        return self.kind == "victim" and (address >> self.offset_bits) in self.blocks
+
+    def invalidate(self, address) -> tuple:
+        """
+        Returns:
+            tuple: (present: bool, dirty: bool)
+        """
+        dirty = self.blocks.pop(address >> self.offset_bits, None)
+        if dirty is None:
+            return (False, False)
+        return (True, dirty)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+        }
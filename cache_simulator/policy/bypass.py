@@ -1,35 +1,110 @@
 import random
-random.seed(0)
+from collections import OrderedDict
 
 class BypassPolicy:
     """
     Bypass policy base class.
     """
-    def should_bypass(self, cache_set, is_prefetch) -> bool:
+    def should_bypass(self, cache_set, is_prefetch, address) -> bool:
         """
         Decide fill the cache line or not.
         """
         raise NotImplementedError("Should bypass must be implemented in subclass")
-    
+
+    def on_access(self, address, index, tag):
+        """
+        Observe a demand access to the cache, used by learning policies.
+        """
+        pass
+
 class NoBypass(BypassPolicy):
     """
     Never bypass, fill all data.
     """
-    def should_bypass(self, cache_set, is_prefetch):
+    def should_bypass(self, cache_set, is_prefetch, address):
         return False
-    
+
 class ProbBypass(BypassPolicy):
     """
     Probabilistic bypass policy.
+
+    Each instance owns its random generator, so two caches with bypass do not share a stream.
     """
 
-    def __init__(self, bypass_prob_demand=0.01, bypass_prob_prefetch=0.20):
+    def __init__(self, bypass_prob_demand=0.01, bypass_prob_prefetch=0.20, seed=0):
         self.prob_demand = bypass_prob_demand
         self.prob_prefetch = bypass_prob_prefetch
+        self.rng = random.Random(seed)
 
-    def should_bypass(self, cache_set, is_prefetch):
+    def should_bypass(self, cache_set, is_prefetch, address):
         if not cache_set.is_full():
             return False
-        
+
         threshold = self.prob_prefetch if is_prefetch else self.prob_demand
-        return random.random() < threshold
\ No newline at end of file
+        return self.rng.random() < threshold
+
+class DeadBlockBypass(BypassPolicy):
+    """
+    Sampler-based dead block predictor.
+
+    A few sampled sets of the cache are mirrored in a small LRU tag array (the sampler).
+    Each sampler entry remembers the signature of its block, the hashed memory region
+    the block belongs to. A block reused in the sampler trains its signature towards
+    "live", a block evicted from the sampler without reuse trains it towards "dead".
+    Fills whose signature counter reaches the threshold are predicted dead and bypassed.
+
+    The sampler sees every access, including bypassed ones, so predictions keep adapting.
+
+    Attributes:
+        region_bits: log2 of the region size used as signature (12 -> 4KB regions).
+        table_size: Number of saturating counters.
+        counter_max: Saturation value of the counters.
+        threshold: Counter value from which a block is predicted dead.
+        sample_interval: Every sample_interval-th set of the cache is sampled.
+        sampler_ways: Associativity of the sampler.
+        bypass_prefetch: Apply the prediction to prefetch fills too.
+    """
+
+    def __init__(self, set_num, associativity, region_bits=12, table_size=1024, counter_max=3,
+                 threshold=3, sampler_sets=32, bypass_prefetch=True):
+        self.region_bits = region_bits
+        self.table_size = table_size
+        self.counter_max = counter_max
+        self.threshold = threshold
+        self.sample_interval = max(1, set_num // sampler_sets)
+        self.sampler_ways = associativity
+        self.bypass_prefetch = bypass_prefetch
+        self.counters = [0] * table_size
+        # set index -> OrderedDict(tag -> (signature, reused)), ordered from LRU to MRU
+        self.sampler = {}
+
+    def signature(self, address):
+        region = address >> self.region_bits
+        return (region ^ (region >> 16)) % self.table_size
+
+    def should_bypass(self, cache_set, is_prefetch, address):
+        if not cache_set.is_full():
+            return False
+        if is_prefetch and not self.bypass_prefetch:
+            return False
+        return self.counters[self.signature(address)] >= self.threshold
+
+    def on_access(self, address, index, tag):
+        if index % self.sample_interval != 0:
+            return
+        sampler_set = self.sampler.setdefault(index, OrderedDict())
+        entry = sampler_set.get(tag)
+        if entry is not None:
+            # Reused: the block was live
+            signature = entry[0]
+            if self.counters[signature] > 0:
+                self.counters[signature] -= 1
+            sampler_set[tag] = (signature, True)
+            sampler_set.move_to_end(tag)
+            return
+        if len(sampler_set) >= self.sampler_ways:
+            _, (victim_signature, reused) = sampler_set.popitem(last=False)
+            # Evicted without reuse: the block was dead
+            if not reused and self.counters[victim_signature] < self.counter_max:
+                self.counters[victim_signature] += 1
+        sampler_set[tag] = (self.signature(address), False)
@@ -1,12 +1,23 @@
 from cache_simulator.policy.bypass import *
 
-def BypassPolicyFactory(config):
+def BypassPolicyFactory(config, set_num=1, associativity=1):
     if config == None:
         return NoBypass()
     policy_name = config.get("policy_name", "NoBypass")
     if policy_name == "NoBypass":
         return NoBypass()
     elif policy_name == "Prob":
-        return ProbBypass(config.get("bypass_prob_demand", 0.05), config.get("bypass_prob_prefetch", 0.2))
+        return ProbBypass(config.get("bypass_prob_demand", 0.05), config.get("bypass_prob_prefetch", 0.2), config.get("seed", 0))
+    elif policy_name == "DeadBlock":
+        return DeadBlockBypass(
+            set_num,
+            associativity,
+            region_bits=config.get("region_bits", 12),
+            table_size=config.get("table_size", 1024),
+            counter_max=config.get("counter_max", 3),
+            threshold=config.get("threshold", 3),
+            sampler_sets=config.get("sampler_sets", 32),
+            bypass_prefetch=config.get("bypass_prefetch", True)
+        )
     else:
         return NoBypass()
\ No newline at end of file
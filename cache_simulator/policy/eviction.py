@@ -59,4 +59,52 @@ class SRRIP(EvictionPolicy):
         line.state = 0
 
     def on_fill(self, cache_set, line, timestamp):
-        line.state = 2
\ No newline at end of file
+        line.state = 2
+
+class SHiP(SRRIP):
+    """
+    Signature-based Hit Predictor on top of SRRIP.
+
+    The signature of a line is a hash of the memory region it belongs to (the traces
+    carry no PC). A table of saturating counters (SHCT) learns per signature whether
+    lines get re-referenced: a hit increments the counter of the line's signature, an
+    eviction without any hit decrements it. Lines whose signature counter is zero are
+    inserted with distant RRPV (3) so scans leave the cache quickly, others with RRPV 2.
+
+    Attributes:
+        region_bits: log2 of the region size used as signature (12 -> 4KB regions).
+        table_size: Number of counters in the SHCT.
+        counter_max: Saturation value of the counters.
+        line_info: Line -> [signature, re-referenced] for every filled line.
+    """
+
+    def __init__(self, region_bits=12, table_size=16384, counter_max=7):
+        self.region_bits = region_bits
+        self.table_size = table_size
+        self.counter_max = counter_max
+        self.shct = [1] * table_size
+        self.line_info = {}
+
+    def signature(self, address):
+        region = address >> self.region_bits
+        return (region ^ (region >> 14)) % self.table_size
+
+    def evict(self, cache_set) -> Line:
+        victim = super().evict(cache_set)
+        info = self.line_info.get(victim)
+        if info is not None and not info[1] and self.shct[info[0]] > 0:
+            self.shct[info[0]] -= 1
+        return victim
+
+    def update_on_access(self, cache_set, line, timestamp):
+        line.state = 0
+        info = self.line_info.get(line)
+        if info is not None:
+            info[1] = True
+            if self.shct[info[0]] < self.counter_max:
+                self.shct[info[0]] += 1
+
+    def on_fill(self, cache_set, line, timestamp):
+        signature = self.signature(cache_set.get_address_of_line(line))
+        self.line_info[line] = [signature, False]
+        line.state = 3 if self.shct[signature] == 0 else 2
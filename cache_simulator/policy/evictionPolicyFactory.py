@@ -5,7 +5,7 @@ def EvictionPolicyFactory(policy_name):
     Factory function to create eviction policy instances based on the policy name.
 
     Args:
-        policy_name (str): Name of the eviction policy (e.g., 'LRU', 'FIFO').
+        policy_name (str): Name of the eviction policy (e.g., 'LRU', 'SRRIP', 'SHiP').
 
     Returns:
         EvictionPolicy: An instance of the corresponding eviction policy class.
@@ -14,5 +14,7 @@ def EvictionPolicyFactory(policy_name):
         return LRU()
     elif policy_name == 'SRRIP':
         return SRRIP()
+    elif policy_name == 'SHiP':
+        return SHiP()
     else:
         raise ValueError(f"Unknown eviction policy: {policy_name}")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 class PrefetchPolicy:
     def __init__(self, degree=1):
         self.degree = degree
@@ -13,6 +15,24 @@ class PrefetchPolicy:
         Based on the addr and block_size, return list of the address need to be prefetched.
         """
         return []
+
+    def on_prefetch_fill(self, addr, evicted_addr, block_size):
+        """
+        Observe a prefetch filled into the cache, evicted_addr is the line it replaced (None if none).
+        """
+        pass
+
+    def get_stats(self) -> dict:
+        """
+        Statistics to be reported by Performance. Empty if the policy has nothing to report.
+        """
+        return {}
+
+    def reset_stats(self):
+        """
+        Forget the statistics gathered so far, the prediction state stays.
+        """
+        pass
     
 class NoPrefetch(PrefetchPolicy):
     """
@@ -192,4 +212,176 @@ class Stride(PrefetchPolicy):
             victim.state = "Initial"
             victim.access_time = self.timestamp
 
-        return []
\ No newline at end of file
+        return []
+
+class ThrottledPrefetch(PrefetchPolicy):
+    """
+    Feedback-directed throttling around any prefetch policy (Srinath et al., HPCA 2007).
+
+    Over every interval of demand events (misses and first hits on prefetched lines)
+    the wrapper measures:
+
+    - accuracy: of the prefetches filled in this interval and the previous one, the
+      fraction already used by a demand access. A use is credited to the interval
+      that filled the line, so prefetches filled near the end of an interval are
+      judged once more with the uses they get in the next one.
+    - lateness: used prefetches whose first use came within late_window demand events
+      of their fill, among the prefetches used in this interval. Prefetches are filled
+      instantly here, with a real memory latency those would still be in flight.
+    - pollution: demand misses on lines evicted by a prefetch fill / demand misses,
+      tracked with a bit vector of evicted blocks that is cleared every interval.
+
+    At the end of the interval the aggressiveness follows the decision table of the
+    paper: accurate prefetches that arrive late increase it, polluting or inaccurate
+    late prefetches decrease it, anything else keeps it.
+    Degree and distance move together, one step at a time, within the configured
+    bounds. The distance shifts every candidate further ahead of the trigger in
+    its direction.
+
+    Attributes:
+        policy: Wrapped PrefetchPolicy, its degree is set by the wrapper.
+        degree: Current degree.
+        distance: Current distance, in blocks.
+        history: (interval, degree, distance, accuracy, lateness, pollution) of every finished interval.
+    """
+
+    def __init__(self, policy, degree, min_degree=1, max_degree=16, distance=0, min_distance=0, max_distance=16,
+                 interval=2048, accuracy_high=0.75, accuracy_low=0.40, lateness_threshold=0.10,
+                 pollution_threshold=0.05, late_window=8, filter_bits=4096):
+        self.policy = policy
+        self.min_degree = min_degree
+        self.max_degree = max_degree
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.degree = min(max(degree, min_degree), max_degree)
+        self.distance = min(max(distance, min_distance), max_distance)
+        self.policy.degree = self.degree
+        self.interval = interval
+        self.accuracy_high = accuracy_high
+        self.accuracy_low = accuracy_low
+        self.lateness_threshold = lateness_threshold
+        self.pollution_threshold = pollution_threshold
+        self.late_window = late_window
+        self.filter_bits = filter_bits
+        self.pollution_filter = bytearray(filter_bits)
+        # block address -> demand event count at fill, for prefetched lines not used yet
+        self.pending = OrderedDict()
+        self.events = 0
+        self.intervals = 0
+        self.history = []
+        # Prefetches filled in the previous interval and how many of them were used
+        self.previous_issued = 0
+        self.previous_useful = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        # issued and useful count the prefetches filled in this interval, used the
+        # first hits on prefetched lines happening in it
+        self.issued = 0
+        self.useful = 0
+        self.used = 0
+        self.late = 0
+        self.demand_misses = 0
+        self.polluting_misses = 0
+
+    def on_miss(self, addr, block_size):
+        block_addr = (addr // block_size) * block_size
+        self.demand_misses += 1
+        bit = (block_addr // block_size) % self.filter_bits
+        if self.pollution_filter[bit]:
+            self.polluting_misses += 1
+            self.pollution_filter[bit] = 0
+        self.pending.pop(block_addr, None)
+        candidates = self.apply_distance(block_addr, self.policy.on_miss(addr, block_size), block_size)
+        self.tick()
+        return candidates
+
+    def on_hit(self, addr, block_size):
+        # Only called on the first hit of a prefetched line
+        block_addr = (addr // block_size) * block_size
+        self.used += 1
+        filled_at = self.pending.pop(block_addr, None)
+        if filled_at is not None:
+            filled_in = filled_at // self.interval
+            if filled_in == self.intervals:
+                self.useful += 1
+            elif filled_in == self.intervals - 1:
+                self.previous_useful += 1
+            if self.events - filled_at <= self.late_window:
+                self.late += 1
+        candidates = self.apply_distance(block_addr, self.policy.on_hit(addr, block_size), block_size)
+        self.tick()
+        return candidates
+
+    def on_prefetch_fill(self, addr, evicted_addr, block_size):
+        block_addr = (addr // block_size) * block_size
+        self.issued += 1
+        self.pending[block_addr] = self.events
+        self.pending.move_to_end(block_addr)
+        # Lines evicted unused are never popped, keep the oldest ones out
+        if len(self.pending) > self.filter_bits:
+            self.pending.popitem(last=False)
+        if evicted_addr is not None:
+            self.pollution_filter[(evicted_addr // block_size) % self.filter_bits] = 1
+        self.policy.on_prefetch_fill(addr, evicted_addr, block_size)
+
+    def apply_distance(self, block_addr, candidates, block_size):
+        if self.distance == 0:
+            return candidates
+        shifted = []
+        for candidate in candidates:
+            direction = 1 if candidate >= block_addr else -1
+            shifted.append(candidate + direction * self.distance * block_size)
+        return shifted
+
+    def tick(self):
+        self.events += 1
+        if self.events % self.interval == 0:
+            self.adjust()
+
+    def adjust(self):
+        issued = self.previous_issued + self.issued
+        accuracy = (self.previous_useful + self.useful) / issued if issued > 0 else 0.0
+        lateness = self.late / self.used if self.used > 0 else 0.0
+        pollution = self.polluting_misses / self.demand_misses if self.demand_misses > 0 else 0.0
+
+        if issued > 0:
+            late = lateness > self.lateness_threshold
+            polluting = pollution > self.pollution_threshold
+            if accuracy >= self.accuracy_high:
+                # Accurate: late prefetches need more aggressiveness, pollution less
+                if late:
+                    self.step(1)
+                elif polluting:
+                    self.step(-1)
+            elif accuracy >= self.accuracy_low:
+                if polluting:
+                    self.step(-1)
+                elif late:
+                    self.step(1)
+            elif late or polluting:
+                # Inaccurate prefetches only cost bandwidth and capacity
+                self.step(-1)
+
+        self.history.append((self.intervals, self.degree, self.distance, accuracy, lateness, pollution))
+        self.intervals += 1
+        self.previous_issued = self.issued
+        self.previous_useful = self.useful
+        self.reset_counters()
+        self.pollution_filter = bytearray(self.filter_bits)
+
+    def step(self, direction):
+        self.degree = min(max(self.degree + direction, self.min_degree), self.max_degree)
+        self.distance = min(max(self.distance + direction, self.min_distance), self.max_distance)
+        self.policy.degree = self.degree
+
+    def reset_stats(self):
+        # The current aggressiveness and the interval in progress are state, they stay
+        self.history = []
+
+    def get_stats(self) -> dict:
+        return {
+            "degree": self.degree,
+            "distance": self.distance,
+            "history": [list(entry) for entry in self.history],
+        }
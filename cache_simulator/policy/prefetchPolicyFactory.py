@@ -3,6 +3,12 @@ from cache_simulator.policy.prefetch import *
 def PrefetchPolicyFactory(config):
     if config is None:
         return NoPrefetch()
+    throttle = config.get('throttle', None)
+    if throttle is not None:
+        policy = PrefetchPolicyFactory({key: value for key, value in config.items() if key != 'throttle'})
+        if isinstance(policy, NoPrefetch):
+            return policy
+        return ThrottledPrefetch(policy, degree=policy.degree, **throttle)
     policy_name = config.get('policy_name', None)
     if policy_name == 'NextNLine':
         return NexNLine(degree=config.get('degree', 1))
@@ -2,56 +2,204 @@ import argparse
 import json
 import os
 from cache_simulator.controller.control import MemoryController
+from cache_simulator.controller.memoryHierarchy import MemoryHierarchy
+from cache_simulator.controller.footprint import estimate_footprint, format_footprint, format_bytes
+from cache_simulator.controller.performance import Performance
+from cache_simulator.controller.resultCache import ResultCache
+from cache_simulator.controller.lockstep import LockstepSimulator, run_controllers
+from cache_simulator.controller.progress import ProgressMonitor
+from cache_simulator.controller.daemon import DaemonClient
+from cache_simulator.controller.trace import is_filtered_trace, read_filtered_trace_passes, estimate_trace_length, FilteredTraceWriter
 
 def main():
     parser = argparse.ArgumentParser(description="Cache Simulator")
-    parser.add_argument("--config", type=str, required=True, help="Path to the cache configuration JSON file")
-    parser.add_argument("--trace", type=str, required=True, help="Path to the memory access trace file")
+    parser.add_argument("--config", type=str, nargs="+", required=True, help="Path to the cache configuration JSON file, several configs are simulated in one pass over the trace")
+    parser.add_argument("--trace", type=str, default=None, help="Path to the memory access trace file, required unless --estimate-memory")
     parser.add_argument("--warmup", type=int, required=False, default=3, help="Loop time to run the trace")
+    parser.add_argument("--no-cache", action="store_true", help="Always simulate, do not read or write the result cache")
+    parser.add_argument("--cache-dir", type=str, default=".result_cache", help="Directory of the result cache")
+    parser.add_argument("--cache-size", type=int, default=64, help="Size bound of the result cache in MB")
+    parser.add_argument("--export-level", type=str, default=None, help="id of the cache level whose outgoing requests are exported")
+    parser.add_argument("--export-trace", type=str, default=None, help="Path of the filtered trace written for --export-level")
+    parser.add_argument("--progress", type=float, default=10.0, help="Seconds between progress lines, 0 disables them")
+    parser.add_argument("--converge", type=float, default=None, help="Stop once the 95%% confidence interval half-width of the L1 and last level miss rates is below this value (e.g. 0.001)")
+    parser.add_argument("--converge-batch", type=int, default=10000, help="Accesses per batch of the batch-means convergence test")
+    parser.add_argument("--daemon", type=str, default=None, help="Run the simulations on the simulation daemon at this Unix socket path or host:port")
+    parser.add_argument("--warm-trace", type=str, default=None, help="With --daemon, start from caches warmed by this trace (statistics reset after warm-up)")
+    parser.add_argument("--warm-passes", type=int, default=1, help="Passes over --warm-trace")
+    parser.add_argument("--estimate-memory", action="store_true", help="Print the projected memory footprint of every config and exit without simulating")
+    parser.add_argument("--memory-budget", type=float, default=None, help="Memory budget in MB of the simulated hierarchies; over it the compact representation is used, and the run is refused if that does not fit either")
+    parser.add_argument("--memory-report", action="store_true", help="Add the per-level memory footprint and the peak RSS to the report")
     args = parser.parse_args()
 
-    # Initialize Controller
-    controller = MemoryController(args.config)
-    
-    # Run Simulation
-    run_simulation(controller, args.trace, args.warmup)
-
-    # Load configuration data for reporting
-    config_data = {}
-    try:
-        with open(args.config, 'r') as f:
-            config_data = json.load(f)
-    except Exception as e:
-        print(f"Warning: Could not read config file for report: {e}")
-
-    # Output Results
-    # 1. Print to Terminal (Beautified)
+    if args.converge is not None and args.converge <= 0:
+        parser.error("--converge must be positive")
+    if args.converge_batch < 1:
+        parser.error("--converge-batch must be positive")
+    if args.warm_trace is not None and args.daemon is None:
+        parser.error("--warm-trace needs --daemon")
+    if args.daemon is not None and (args.converge is not None or args.export_trace is not None):
+        parser.error("--converge and --export-trace are not supported with --daemon")
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        parser.error("--memory-budget must be positive")
+    if args.daemon is not None and args.memory_budget is not None:
+        parser.error("--memory-budget is not supported with --daemon")
+
+    if args.estimate_memory:
+        estimate_memory(args)
+        return
+    if args.trace is None:
+        parser.error("the following arguments are required: --trace")
+
+    if (args.export_level is None) != (args.export_trace is None):
+        parser.error("--export-level and --export-trace must be given together")
+    if args.export_trace is not None:
+        if len(args.config) != 1:
+            parser.error("--export-trace needs exactly one --config")
+        export_filtered_trace(args, choose_representation(parser, args, args.config))
+        return
+
+    result_cache = None
+    if not args.no_cache:
+        result_cache = ResultCache(args.cache_dir, args.cache_size * 1024**2)
+
+    # Look up stored results, only configs without one are simulated
+    results = {}
+    pending = []
+    for config_path in args.config:
+        # Load configuration data for reporting and result lookup
+        config_data = {}
+        try:
+            with open(config_path, 'r') as f:
+                config_data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not read config file for report: {e}")
+
+        cache_key = None
+        performance = None
+        if result_cache is not None and config_data:
+            options = {"warmup": args.warmup}
+            if args.converge is not None:
+                options.update(converge=args.converge, converge_batch=args.converge_batch)
+            if args.warm_trace is not None:
+                options.update(warm_trace=result_cache.trace_hash(args.warm_trace), warm_passes=args.warm_passes)
+            if args.memory_report:
+                options.update(memory_report=True)
+            cache_key = result_cache.make_key(config_data, args.trace, options)
+            stored = result_cache.load(cache_key)
+            if stored is not None:
+                print(f"Result cache hit for {config_path} ({cache_key[:12]}), skipping simulation")
+                performance = Performance.from_dict(stored)
+        results[config_path] = (config_data, cache_key, performance)
+        if performance is None and config_path not in pending:
+            pending.append(config_path)
+
+    if pending and args.daemon is not None:
+        # The daemon keeps decoded traces and warm caches between invocations
+        jobs = [make_daemon_job(args, results[config_path][0]) for config_path in pending]
+        performances = [Performance.from_dict(result) for result in DaemonClient(args.daemon).run(jobs)]
+    elif pending:
+        # The configs share one decode of the trace, and one process
+        simulator = LockstepSimulator(pending, compact=choose_representation(parser, args, pending))
+        monitor = make_monitor(args, simulator.controllers, labels=pending if len(pending) > 1 else None)
+        simulator.run(args.trace, args.warmup, batch_size=monitor_batch_size(args), monitor=monitor)
+        if args.memory_report:
+            for controller in simulator.controllers:
+                controller.account_memory()
+        performances = [controller.performance for controller in simulator.controllers]
+    else:
+        performances = []
+
+    for config_path, performance in zip(pending, performances):
+        config_data, cache_key, _ = results[config_path]
+        results[config_path] = (config_data, cache_key, performance)
+        if cache_key is not None:
+            result_cache.store(cache_key, performance.to_dict())
+
+    for config_path in args.config:
+        config_data, _, performance = results[config_path]
+        # Output Results
+        # 1. Print to Terminal (Beautified)
+        performance.print_stats()
+
+        # 2. Save to File
+        performance.save_to_file(args.trace, config_path, config_data)
+
+def make_daemon_job(args, config_data) -> dict:
+    # The daemon does not share our working directory, send the parsed config and absolute paths
+    job = {"config": config_data, "trace": os.path.abspath(args.trace), "warmup": args.warmup}
+    if args.warm_trace is not None:
+        job.update(warm_trace=os.path.abspath(args.warm_trace), warm_passes=args.warm_passes)
+    if args.memory_report:
+        job.update(memory_report=True)
+    return job
+
+def estimate_memory(args):
+    """
+    Print the projected footprint of every config, in both representations.
+    """
+    for config_path in args.config:
+        footprint = estimate_footprint(MemoryHierarchy(config_path))
+        compact = estimate_footprint(MemoryHierarchy(config_path, compact=True))
+        print(f"Projected memory footprint of {config_path} (every set touched):")
+        print("\n".join(format_footprint(footprint)))
+        print(f"Compact representation: {format_bytes(compact['total'])}\n")
+
+def choose_representation(parser, args, config_paths) -> bool:
+    """
+    Check the projected footprint of the configs simulated together against
+    --memory-budget. Over the budget the compact representation is used; if even that
+    does not fit, the run is refused before anything is built.
+
+    Returns:
+        bool: True to build the caches with the compact representation.
+    """
+    if args.memory_budget is None:
+        return False
+    budget = args.memory_budget * 1024**2
+    default = sum(estimate_footprint(MemoryHierarchy(path))["total"] for path in config_paths)
+    if default <= budget:
+        return False
+    compact = sum(estimate_footprint(MemoryHierarchy(path, compact=True))["total"] for path in config_paths)
+    if compact > budget:
+        parser.error(f"projected footprint {format_bytes(compact)} exceeds --memory-budget {args.memory_budget:g}MB even with the compact representation")
+    print(f"Projected footprint {format_bytes(default)} exceeds --memory-budget {args.memory_budget:g}MB, "
+          f"using the compact representation ({format_bytes(compact)})")
+    return True
+
+def make_monitor(args, controllers, labels=None, converge=True) -> ProgressMonitor:
+    passes = read_filtered_trace_passes(args.trace) if is_filtered_trace(args.trace) else args.warmup
+    return ProgressMonitor(
+        controllers,
+        total=estimate_trace_length(args.trace) * passes,
+        interval=args.progress,
+        threshold=args.converge if converge else None,
+        labels=labels
+    )
+
+def monitor_batch_size(args) -> int:
+    # Convergence samples one batch at a time
+    return args.converge_batch if args.converge is not None else 65536
+
+def export_filtered_trace(args, compact=False):
+    """
+    Simulate one config and write the requests leaving --export-level to --export-trace.
+    """
+    controller = MemoryController(args.config[0], compact=compact)
+    writer = FilteredTraceWriter(args.export_trace)
+    controller.start_recording(args.export_level, writer)
+    # The exported trace must cover whole passes, never stop early
+    run_controllers([controller], args.trace, args.warmup, monitor=make_monitor(args, [controller], converge=False))
+    writer.passes = args.warmup if not is_filtered_trace(args.trace) else read_filtered_trace_passes(args.trace)
+    writer.close()
+    print(f"Exported {writer.record_count} requests leaving {args.export_level} to {args.export_trace}")
+    if args.memory_report:
+        controller.account_memory()
+
+    with open(args.config[0], 'r') as f:
+        config_data = json.load(f)
     controller.performance.print_stats()
-    
-    # 2. Save to File
-    controller.performance.save_to_file(args.trace, args.config, config_data)
-
-def run_simulation(controller: MemoryController, trace_file: str, warmup: int):
-    for _ in range(warmup):
-        with open(trace_file, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) != 2:
-                    continue
-                operation, address_str = parts
-                address = int(address_str, 16)
-
-                if operation == 'r':
-                    controller.read(address)
-                elif operation == 'w':
-                    controller.write(address)
-                else:
-                    print(f"Unknown operation: {operation}")
-
-    controller.collect_prefetch_information()
-    controller.calculate_AMAT(level=0)
-    controller.performance.calculate_average_metrics(warmup)
-    # Note: print_stats call is moved to main() to handle config data passing better
+    controller.performance.save_to_file(args.trace, args.config[0], config_data)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()